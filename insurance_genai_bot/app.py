@@ -8,8 +8,11 @@ from utils.session_state import init_session_state
 from core.rag_engine import get_rag_chain
 from core.chat_handler import handle_user_query
 from ui.chat_history import show_chat_history
+from config.env import TRACE_JSONL_PATH, METRICS_PORT
+from utils.tracing import configure_tracing
 
 def main():
+    configure_tracing(TRACE_JSONL_PATH, METRICS_PORT, prefix="medrisk")
     setup_ui()
     init_session_state()
 
@@ -0,0 +1,108 @@
+"""Build time, memory, query latency and recall@k of FAISS index types vs Flat.
+
+Synthetic clustered vectors stand in for chunk embeddings; index strings come
+from core.vector_store, so the numbers match what FAISS_INDEX_TYPE builds:
+
+    python -m benchmarks.bench_ann_index --vectors 100000,1000000 --dim 384 --types flat,ivf,hnsw,pq,sq8 --rerank
+"""
+import argparse
+import json
+import time
+
+import faiss
+import numpy as np
+
+from core.vector_store import configure_search, index_description
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(",") if v]
+
+
+def make_vectors(n_vectors, dim, n_queries, rng, clusters=256):
+    # Gaussian blobs around random centres, roughly how topical chunks cluster.
+    centres = rng.standard_normal((clusters, dim)).astype("float32")
+    labels = rng.integers(0, clusters, n_vectors + n_queries)
+    data = centres[labels] + 0.5 * rng.standard_normal((n_vectors + n_queries, dim)).astype("float32")
+    return data[:n_vectors], data[n_vectors:]
+
+
+def time_queries(index, queries, k):
+    latencies = []
+    results = np.empty((len(queries), k), dtype="int64")
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        _, ids = index.search(query[None, :], k)
+        latencies.append(time.perf_counter() - start)
+        results[i] = ids[0]
+    return results, np.array(latencies) * 1000
+
+
+def recall_at_k(results, truth):
+    return float(np.mean([len(set(r) & set(t)) / len(t) for r, t in zip(results, truth)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=_int_list, default=[100_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--types", default="flat,ivf,hnsw,pq,sq8")
+    parser.add_argument("--rerank", action="store_true", help="Also run pq/sq8 with exact RFlat re-ranking")
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--ef-search", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    variants = []
+    for index_type in args.types.split(","):
+        variants.append((index_type, False))
+        if args.rerank and index_type in ("pq", "sq8"):
+            variants.append((index_type, True))
+
+    results = []
+    print(f"{'vectors':>8} {'index':>22} {'build s':>8} {'MB':>8} {'p50 ms':>8} {'p99 ms':>8} {'recall':>7}")
+    for n_vectors in args.vectors:
+        data, queries = make_vectors(n_vectors, args.dim, args.queries, rng)
+        # Ground truth from an exact search, shared by every index type.
+        exact = faiss.IndexFlatL2(args.dim)
+        exact.add(data)
+        _, truth = exact.search(queries, args.k)
+        for index_type, rerank in variants:
+            description = index_description(index_type, n_vectors, args.dim, rerank)
+            start = time.perf_counter()
+            index = faiss.index_factory(args.dim, description, faiss.METRIC_L2)
+            if not index.is_trained:
+                index.train(data)
+            index.add(data)
+            build_seconds = time.perf_counter() - start
+            configure_search(index, args.nprobe, args.ef_search)
+            found, latencies = time_queries(index, queries, args.k)
+            run = {
+                "vectors": n_vectors,
+                "dim": args.dim,
+                "index_type": index_type,
+                "description": description,
+                "build_seconds": build_seconds,
+                "index_mb": faiss.serialize_index(index).nbytes / 2 ** 20,
+                "p50_ms": float(np.percentile(latencies, 50)),
+                "p99_ms": float(np.percentile(latencies, 99)),
+                "recall_at_k": recall_at_k(found, truth),
+            }
+            results.append(run)
+            print(
+                f"{n_vectors:>8} {description:>22} {build_seconds:>8.2f} {run['index_mb']:>8.1f} "
+                f"{run['p50_ms']:>8.3f} {run['p99_ms']:>8.3f} {run['recall_at_k']:>7.3f}"
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Throughput of EmbeddingPipeline against the local stub embedding server.
+
+    python -m benchmarks.bench_embedding_pipeline --chunks 2000 --batch-sizes 16,64 --concurrency 1,4,8
+"""
+import argparse
+import json
+
+from langchain_openai import OpenAIEmbeddings
+
+from benchmarks.stub_embedding_server import start_server
+from core.embedding_pipeline import EmbeddingPipeline
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(",") if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--batch-sizes", type=_int_list, default=[16, 64, 256])
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 4, 8])
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub seconds per request")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="Stub fraction of 429 responses")
+    parser.add_argument("--requests-per-minute", type=int, default=None)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    server = start_server(latency=args.latency, error_rate=args.error_rate)
+    embedder = OpenAIEmbeddings(
+        base_url=f"http://127.0.0.1:{server.server_address[1]}/v1",
+        api_key="stub",
+        check_embedding_ctx_length=False,
+        max_retries=0,
+    )
+    texts = [f"Benchmark chunk {i}: room rent limits and non-admissible expenses." for i in range(args.chunks)]
+
+    results = []
+    print(f"{'batch':>6} {'conc':>5} {'seconds':>9} {'chunks/s':>10} {'retries':>8}")
+    for batch_size in args.batch_sizes:
+        for concurrency in args.concurrency:
+            pipeline = EmbeddingPipeline(
+                embedder,
+                batch_size=batch_size,
+                concurrency=concurrency,
+                requests_per_minute=args.requests_per_minute,
+                base_delay=0.05,
+                max_delay=1.0,
+            )
+            pipeline.embed(texts)
+            run = dict(pipeline.last_run, batch_size=batch_size, concurrency=concurrency)
+            results.append(run)
+            print(f"{batch_size:>6} {concurrency:>5} {run['seconds']:>9.2f} {run['chunks_per_second']:>10.1f} {run['retries']:>8}")
+    server.shutdown()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
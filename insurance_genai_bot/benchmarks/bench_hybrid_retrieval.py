@@ -0,0 +1,131 @@
+"""Recall@k and latency of vector-only vs hybrid (BM25 + vector, RRF) retrieval.
+
+Runs offline on a synthetic policy corpus with HashingEmbeddings, which hash
+every token, clause codes included, so the vector side sees the same words
+BM25 does. Half of the queries hinge on an exact clause code, half are
+word-overlap paraphrases. Hashed bags of words are not OpenAI embeddings:
+the numbers show the cost of fusion and whether it helps on exact codes, and
+RETRIEVAL_MODE should only change after the same comparison on real
+embeddings and real questions.
+
+
+    python -m benchmarks.bench_hybrid_retrieval --chunks 20000 --queries 500 --k 5
+"""
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+from benchmarks.fake_embeddings import HashingEmbeddings
+from core.bm25_index import BM25Index
+from core.hybrid_retriever import HybridRetriever, reciprocal_rank_fusion
+
+TOPIC_WORDS = (
+    "room rent limit icu charges non-admissible consumables pre-existing disease waiting period "
+    "co-payment sub-limit cataract maternity ambulance daycare domiciliary ayush organ donor "
+    "cashless reimbursement network hospital claim settlement deductible sum insured restoration "
+    "bonus renewal portability exclusion pharmacy diagnostics surgeon fees implants dialysis "
+    "chemotherapy physiotherapy ward nursing pre-authorisation discharge summary investigation"
+).split()
+
+
+def make_corpus(n_chunks, rng):
+    texts, codes, topics = [], [], []
+    for i in range(n_chunks):
+        words = rng.sample(TOPIC_WORDS, 6)
+        code = f"EXC-{i:06d}"
+        texts.append(f"Clause {code}: {' '.join(words)} as per policy wording.")
+        codes.append(code)
+        topics.append(words)
+    return texts, codes, topics
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q) * 1000) if samples else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--fetch-k", type=int, default=20)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    texts, codes, topics = make_corpus(args.chunks, rng)
+    ids = [f"chunk-{i}" for i in range(args.chunks)]
+    embeddings = HashingEmbeddings(args.dim)
+
+    start = time.perf_counter()
+    vectorstore = FAISS.from_embeddings(
+        list(zip(texts, embeddings.embed_documents(texts))), embeddings, ids=ids
+    )
+    vector_build = time.perf_counter() - start
+    start = time.perf_counter()
+    bm25 = BM25Index.build(ids, texts)
+    bm25_build = time.perf_counter() - start
+    retriever = HybridRetriever(vectorstore=vectorstore, bm25=bm25, k=args.k, fetch_k=args.fetch_k)
+
+    queries = []
+    for _ in range(args.queries):
+        target = rng.randrange(args.chunks)
+        if rng.random() < 0.5:
+            queries.append(("exact", f"Is {codes[target]} applicable to my claim?", ids[target]))
+        else:
+            queries.append(("paraphrase", " ".join(rng.sample(topics[target], 4)), ids[target]))
+
+    hits = {mode: {"exact": 0, "paraphrase": 0} for mode in ("vector", "hybrid")}
+    counts = {"exact": 0, "paraphrase": 0}
+    timings = {"vector": [], "bm25": [], "hybrid": []}
+    for kind, query, relevant in queries:
+        counts[kind] += 1
+        start = time.perf_counter()
+        vector_ids = retriever.vector_ids(query)
+        vector_seconds = time.perf_counter() - start
+        timings["vector"].append(vector_seconds)
+        start = time.perf_counter()
+        lexical_ids = retriever.lexical_ids(query)
+        bm25_seconds = time.perf_counter() - start
+        timings["bm25"].append(bm25_seconds)
+        start = time.perf_counter()
+        fused = reciprocal_rank_fusion([vector_ids, lexical_ids], retriever.rrf_k)[: args.k]
+        timings["hybrid"].append(vector_seconds + bm25_seconds + time.perf_counter() - start)
+        hits["vector"][kind] += relevant in vector_ids[: args.k]
+        hits["hybrid"][kind] += relevant in fused
+
+    results = {
+        "chunks": args.chunks,
+        "queries": args.queries,
+        "k": args.k,
+        "build_seconds": {"vector": vector_build, "bm25": bm25_build},
+        "recall": {
+            mode: {kind: hits[mode][kind] / counts[kind] if counts[kind] else 0.0 for kind in counts}
+            for mode in hits
+        },
+        "latency_ms": {
+            name: {"p50": percentile_ms(samples, 50), "p99": percentile_ms(samples, 99)}
+            for name, samples in timings.items()
+        },
+    }
+    print(f"{'mode':>8} {'recall exact':>13} {'recall para':>12} {'p50 ms':>8} {'p99 ms':>8}")
+    for mode in ("vector", "hybrid"):
+        recall, latency = results["recall"][mode], results["latency_ms"][mode]
+        print(f"{mode:>8} {recall['exact']:>13.3f} {recall['paraphrase']:>12.3f} {latency['p50']:>8.3f} {latency['p99']:>8.3f}")
+    bm25_latency = results["latency_ms"]["bm25"]
+    print(f"BM25 lookup alone: p50 {bm25_latency['p50']:.3f} ms, p99 {bm25_latency['p99']:.3f} ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
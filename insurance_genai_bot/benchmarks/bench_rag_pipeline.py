@@ -0,0 +1,184 @@
+"""Offline benchmark of the Medrisk RAG request path across corpus sizes.
+
+get_rag_chain() is wired to HashingEmbeddings and FixedLatencyChatModel and
+to a synthetic corpus in a temporary folder, so runs need no network and are
+repeatable. Reports index build and load time, on-disk size, RSS, retrieval
+p50/p99 and chain overhead (wall time minus the fake model's latency):
+
+    python -m benchmarks.bench_rag_pipeline --chunks 1000,10000,100000,500000 --output bench_rag.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+
+WORK_DIR = tempfile.mkdtemp(prefix="medrisk_bench_")
+# Must be set before config.env is imported, and never points at the real index.
+os.environ["FAISS_DB_PATH"] = os.path.join(WORK_DIR, "faiss_index")
+
+from langchain_core.documents import Document  # noqa: E402
+
+from benchmarks.fake_embeddings import HashingEmbeddings  # noqa: E402
+from benchmarks.fake_llm import FixedLatencyChatModel  # noqa: E402
+from core import rag_engine  # noqa: E402
+from core.vector_store import process_memory_mb  # noqa: E402
+
+VOCABULARY = (
+    "policy claim hospital room rent limit icu consumables non-admissible exclusion waiting period "
+    "pre-existing disease co-payment deductible sum insured cashless reimbursement network surgeon "
+    "implant dialysis chemotherapy maternity ambulance daycare discharge investigation pharmacy "
+    "premium renewal portability bonus restoration sub-limit cataract physiotherapy nursing ward"
+).split()
+
+
+def chunk_text(rng, words=110):
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+def percentiles_ms(samples):
+    samples = np.asarray(samples) * 1000
+    return {"p50": float(np.percentile(samples, 50)), "p99": float(np.percentile(samples, 99))}
+
+
+def folder_mb(folder):
+    total = sum(
+        os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(folder) for name in names
+    )
+    return total / 2 ** 20
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def prepare_corpus(n_chunks, chunks_per_file, seed):
+    data_folder = os.path.join(WORK_DIR, "data")
+    for folder in (data_folder, os.environ["FAISS_DB_PATH"]):
+        shutil.rmtree(folder, ignore_errors=True)
+    os.makedirs(data_folder)
+    sizes = {}
+    for i, start in enumerate(range(0, n_chunks, chunks_per_file)):
+        name = f"corpus_{i:05d}.pdf"
+        # Placeholder file: only its name and hash matter, chunks come from fake_documents.
+        with open(os.path.join(data_folder, name), "w", encoding="utf-8") as f:
+            f.write(f"{seed}:{n_chunks}:{i}")
+        sizes[name] = min(chunks_per_file, n_chunks - start)
+
+    def fake_documents(path):
+        name = os.path.basename(path)
+        rng = random.Random(f"{seed}:{name}")
+        return [
+            Document(page_content=chunk_text(rng), metadata={"source": name, "page": j})
+            for j in range(sizes[name])
+        ]
+
+    return data_folder, fake_documents
+
+
+def run_size(n_chunks, args, llm):
+    data_folder, fake_documents = prepare_corpus(n_chunks, args.chunks_per_file, args.seed)
+    rag_engine.DATA_FOLDER = data_folder
+    rag_engine.load_file_documents = fake_documents
+    rag_engine.make_embeddings = lambda: HashingEmbeddings(args.dim)
+    rag_engine.make_llm = lambda: llm
+
+    memory_before = process_memory_mb()
+    rag_engine._chain_state["chain"] = None
+    start = time.perf_counter()
+    rag_engine.get_rag_chain()
+    build_seconds = time.perf_counter() - start
+
+    # A second build with unchanged data is the per-process startup cost.
+    rag_engine._chain_state["chain"] = None
+    start = time.perf_counter()
+    qa_chain = rag_engine.get_rag_chain()
+    load_seconds = time.perf_counter() - start
+    memory_after = process_memory_mb()
+
+    rng = random.Random(args.seed + n_chunks)
+    queries = [" ".join(rng.sample(VOCABULARY, 6)) + f" q{i}" for i in range(args.queries)]
+    retrieval = []
+    for query in queries:
+        start = time.perf_counter()
+        qa_chain.retriever.invoke(query)
+        retrieval.append(time.perf_counter() - start)
+
+    overhead, first_token = [], []
+    for query in queries[: args.chain_queries]:
+        start = time.perf_counter()
+        qa_chain.invoke(query + " chain")
+        overhead.append(time.perf_counter() - start - llm.latency)
+        start = time.perf_counter()
+        next(iter(rag_engine.stream_answer(qa_chain, query + " stream")))
+        first_token.append(time.perf_counter() - start - llm.first_token_latency)
+
+    return {
+        "chunks": n_chunks,
+        "index": rag_engine.load_manifest()["index"],
+        "build_seconds": build_seconds,
+        "load_seconds": load_seconds,
+        "index_mb_on_disk": folder_mb(os.environ["FAISS_DB_PATH"]),
+        "memory_mb": memory_after,
+        "memory_growth_mb": {k: v - memory_before.get(k, 0.0) for k, v in memory_after.items()},
+        "retrieval_ms": percentiles_ms(retrieval),
+        "chain_overhead_ms": percentiles_ms(overhead),
+        "first_token_overhead_ms": percentiles_ms(first_token),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", default="1000,10000,100000", help="Comma-separated corpus sizes")
+    parser.add_argument("--chunks-per-file", type=int, default=2000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--chain-queries", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--first-token-latency", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="bench_rag_pipeline.json")
+    args = parser.parse_args()
+
+    llm = FixedLatencyChatModel(latency=args.llm_latency, first_token_latency=args.first_token_latency)
+    results = []
+    try:
+        print(f"{'chunks':>8} {'build s':>8} {'load s':>7} {'disk MB':>8} {'ret p50':>8} {'ret p99':>8} {'ovh p50':>8} {'ovh p99':>8}")
+        for n_chunks in [int(v) for v in args.chunks.split(",") if v]:
+            run = run_size(n_chunks, args, llm)
+            results.append(run)
+            print(
+                f"{n_chunks:>8} {run['build_seconds']:>8.2f} {run['load_seconds']:>7.2f} {run['index_mb_on_disk']:>8.1f} "
+                f"{run['retrieval_ms']['p50']:>8.2f} {run['retrieval_ms']['p99']:>8.2f} "
+                f"{run['chain_overhead_ms']['p50']:>8.2f} {run['chain_overhead_ms']['p99']:>8.2f}"
+            )
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+    report = {
+        "bot": "medrisk",
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "retrieval_mode": rag_engine.RETRIEVAL_MODE,
+        "index_type": rag_engine.FAISS_INDEX_TYPE,
+        "settings": vars(args),
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
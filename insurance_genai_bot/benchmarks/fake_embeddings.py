@@ -0,0 +1,44 @@
+"""Offline stand-in for OpenAIEmbeddings used by the benchmarks.
+
+Vectors are a hashed bag of every word in the text, codes and amounts
+included, so texts sharing vocabulary land close together.
+"""
+import hashlib
+import time
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+class HashingEmbeddings(Embeddings):
+    def __init__(self, dim=256, latency=0.0):
+        self.dim = dim
+        # Seconds per API call, to stand in for the OpenAI round trip in load tests.
+        self.latency = latency
+        self.model = f"hashing-{dim}"
+        self.documents_embedded = 0
+
+    def _vector(self, text):
+        vector = np.zeros(self.dim, dtype="float32")
+        for token in text.lower().split():
+            token = token.strip(".,:;?!")
+            if not token:
+                continue
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "big") % self.dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        self.documents_embedded += len(texts)
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._vector(text)
+
+    def stats(self):
+        return {"documents_embedded": self.documents_embedded}
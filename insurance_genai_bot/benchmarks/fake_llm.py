@@ -0,0 +1,57 @@
+"""Fixed-latency stand-in for ChatOpenAI used by the benchmarks.
+
+Every call waits `latency` seconds and answers with a deterministic text
+derived from the prompt; streaming spreads the answer over `tokens` chunks
+after a `first_token_latency` delay. Chain overhead is then measured time
+minus the known model latency.
+"""
+import hashlib
+import time
+from typing import Any, Iterator, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class FixedLatencyChatModel(BaseChatModel):
+    latency: float = 0.5
+    first_token_latency: float = 0.2
+    tokens: int = 20
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fixed-latency-fake"
+
+    def _answer(self, messages):
+        digest = hashlib.sha256("".join(str(m.content) for m in messages).encode("utf-8")).hexdigest()
+        return " ".join(f"token{digest[i % 64]}{i}" for i in range(self.tokens))
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self.calls += 1
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._answer(messages)))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        self.calls += 1
+        time.sleep(self.first_token_latency)
+        words = self._answer(messages).split()
+        per_token = max(0.0, self.latency - self.first_token_latency) / max(1, len(words))
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(per_token)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
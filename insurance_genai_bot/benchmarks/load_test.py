@@ -0,0 +1,188 @@
+"""Headless multi-session load test of the Medrisk chat path.
+
+Each simulated session is a thread that, like a Streamlit script run, calls
+validate_user_query() and chat_handler.respond() (answer caches, retrieval,
+streamed LLM answer, and QA logging if QA_LOG_LIVE_CHAT=1), then waits a sampled
+think time before its next question. Questions are replayed from the QA workbook. OpenAI is replaced by
+HashingEmbeddings and FixedLatencyChatModel with configurable latency, over
+a synthetic index, so one run answers "how many sessions can one worker
+serve" without real traffic:
+
+    python -m benchmarks.load_test --sessions 1,5,10,25,50 --duration 60 --think-time exp:3
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+
+LOG_DIR = tempfile.mkdtemp(prefix="medrisk_load_")
+# Read by config.env on first import, so set before any project import.
+os.environ["QA_LOG_FILE"] = os.path.join(LOG_DIR, "qa.jsonl")
+
+from benchmarks.bench_rag_pipeline import WORK_DIR, git_commit, prepare_corpus  # noqa: E402
+from benchmarks.fake_embeddings import HashingEmbeddings  # noqa: E402
+from benchmarks.fake_llm import FixedLatencyChatModel  # noqa: E402
+from config.env import (  # noqa: E402
+    RESPONSE_CACHE_MAX_ENTRIES, SEMANTIC_CACHE_ENABLED, SEMANTIC_CACHE_MAX_ENTRIES, SEMANTIC_CACHE_THRESHOLD
+)
+from core import chat_handler, rag_engine  # noqa: E402
+from core.response_cache import ResponseCache  # noqa: E402
+from core.semantic_cache import SemanticCache  # noqa: E402
+from core.user_input_validation import validate_user_query  # noqa: E402
+from utils.excel_loader import load_questions_from_excel_all_sheets  # noqa: E402
+from utils.tracing import percentile, tracer  # noqa: E402
+
+DEFAULT_EXCEL = "qa/qa_input/qa_test_questions.xlsx"
+
+
+def think_time_sampler(spec):
+    """Parses 'fixed:S', 'uniform:LOW,HIGH' or 'exp:MEAN' into a function of a Random."""
+    kind, _, value = spec.partition(":")
+    params = [float(v) for v in value.split(",") if v] or [0.0]
+    if kind == "fixed":
+        return lambda rng: params[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(params[0], params[-1])
+    if kind == "exp":
+        return lambda rng: rng.expovariate(1.0 / params[0]) if params[0] > 0 else 0.0
+    raise ValueError(f"Unknown think-time distribution: {spec}")
+
+
+def run_session(session_id, questions, think_time, deadline, args, results, lock):
+    rng = random.Random(args.seed * 1000 + session_id)
+    # Sessions start at different points of the corpus, as real users would.
+    position = rng.randrange(len(questions))
+    while True:
+        time.sleep(min(think_time(rng), max(0.0, deadline - time.perf_counter())))
+        if time.perf_counter() >= deadline:
+            return
+        question = questions[position % len(questions)]
+        position += 1
+        first_token = []
+        start = time.perf_counter()
+
+        def mark_first_token(_):
+            if not first_token:
+                first_token.append(time.perf_counter() - start)
+
+        try:
+            is_valid, _ = validate_user_query(question)
+            if is_valid:
+                chat_handler.respond(rag_engine.get_rag_chain(), question, on_token=mark_first_token)
+                status = "ok"
+            else:
+                status = "rejected"
+        except Exception as e:
+            status = type(e).__name__
+        latency = time.perf_counter() - start
+        with lock:
+            results.append({
+                "session": session_id,
+                "status": status,
+                "latency": latency,
+                "first_token": first_token[0] if first_token else latency,
+            })
+
+
+def summarize(results, sessions, seconds):
+    ok = sorted(r["latency"] for r in results if r["status"] == "ok")
+    first_token = sorted(r["first_token"] for r in results if r["status"] == "ok")
+    statuses = Counter(r["status"] for r in results)
+    failed = sum(n for status, n in statuses.items() if status not in ("ok", "rejected"))
+    return {
+        "sessions": sessions,
+        "seconds": seconds,
+        "requests": len(results),
+        "throughput_rps": len(ok) / seconds if seconds else 0.0,
+        "error_rate": failed / len(results) if results else 0.0,
+        "statuses": dict(statuses),
+        **{f"latency_p{round(q * 100)}_ms": percentile(ok, q) * 1000 for q in (0.5, 0.95, 0.99)},
+        **{f"first_token_p{round(q * 100)}_ms": percentile(first_token, q) * 1000 for q in (0.5, 0.95, 0.99)},
+        "stages": tracer.summary(),
+        "response_cache": chat_handler.response_cache.stats(),
+        "semantic_cache": chat_handler.semantic_cache.stats(),
+        "query_embedding_cache": rag_engine.get_query_embedding_stats(),
+    }
+
+
+def reset_answer_caches(enabled):
+    # Every level starts cold, so levels are comparable and hit rates are per level.
+    chat_handler.SEMANTIC_CACHE_ENABLED = enabled and SEMANTIC_CACHE_ENABLED
+    chat_handler.response_cache = ResponseCache(
+        "medrisk", rag_engine.CHAIN_CONFIG, RESPONSE_CACHE_MAX_ENTRIES if enabled else 0
+    )
+    chat_handler.semantic_cache = SemanticCache(SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_MAX_ENTRIES)
+
+
+def run_level(sessions, questions, think_time, args):
+    # Stage percentiles should describe this level only.
+    tracer.reset()
+    reset_answer_caches(not args.no_answer_cache)
+    results, lock = [], threading.Lock()
+    start = time.perf_counter()
+    deadline = start + args.duration
+    threads = [
+        threading.Thread(target=run_session, args=(i, questions, think_time, deadline, args, results, lock), daemon=True)
+        for i in range(sessions)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Requests still in flight at the deadline finish before the join returns.
+    return summarize(results, sessions, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input_excel", nargs="?", default=DEFAULT_EXCEL, help=f"Question workbook (default: {DEFAULT_EXCEL})")
+    parser.add_argument("--sessions", default="1,5,10,25", help="Comma-separated concurrent session counts")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per session count")
+    parser.add_argument("--think-time", default="exp:3", help="fixed:S, uniform:LOW,HIGH or exp:MEAN seconds")
+    parser.add_argument("--llm-latency", type=float, default=1.5)
+    parser.add_argument("--first-token-latency", type=float, default=0.4)
+    parser.add_argument("--embedding-latency", type=float, default=0.1)
+    parser.add_argument("--chunks", type=int, default=5000, help="Synthetic corpus size")
+    parser.add_argument("--no-answer-cache", action="store_true", help="Disable the response and semantic caches")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="load_test.json")
+    args = parser.parse_args()
+
+    questions = [question for _, question in load_questions_from_excel_all_sheets(args.input_excel)]
+    think_time = think_time_sampler(args.think_time)
+    llm = FixedLatencyChatModel(latency=args.llm_latency, first_token_latency=args.first_token_latency)
+    data_folder, fake_documents = prepare_corpus(args.chunks, 2000, args.seed)
+    rag_engine.DATA_FOLDER = data_folder
+    rag_engine.load_file_documents = fake_documents
+    rag_engine.make_embeddings = lambda: HashingEmbeddings(latency=args.embedding_latency)
+    rag_engine.make_llm = lambda: llm
+
+    levels = []
+    try:
+        rag_engine.get_rag_chain()
+        print(f"Replaying {len(questions)} questions, think time {args.think_time}, {args.duration:.0f}s per level")
+        print(f"{'sessions':>8} {'req/s':>7} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'ttft p95':>9}")
+        for sessions in [int(v) for v in args.sessions.split(",") if v]:
+            level = run_level(sessions, questions, think_time, args)
+            levels.append(level)
+            print(
+                f"{sessions:>8} {level['throughput_rps']:>7.2f} {level['error_rate']:>7.1%} {level['latency_p50_ms']:>8.0f} "
+                f"{level['latency_p95_ms']:>8.0f} {level['latency_p99_ms']:>8.0f} {level['first_token_p95_ms']:>9.0f}"
+            )
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+        shutil.rmtree(LOG_DIR, ignore_errors=True)
+
+    report = {"bot": "medrisk", "commit": git_commit(), "settings": vars(args), "levels": levels}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
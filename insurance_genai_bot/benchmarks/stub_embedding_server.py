@@ -0,0 +1,100 @@
+"""OpenAI-compatible /v1/embeddings stub with deterministic vectors.
+
+Serves fixed-latency responses and can inject 429s, so the embedding pipeline
+can be benchmarked without network access or API spend:
+
+    python -m benchmarks.stub_embedding_server --port 8765 --latency 0.05 --error-rate 0.02
+"""
+import argparse
+import base64
+import hashlib
+import json
+import random
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def fake_vector(text, dim):
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    vector = [rng.gauss(0.0, 1.0) for _ in range(dim)]
+    norm = sum(v * v for v in vector) ** 0.5 or 1.0
+    return [v / norm for v in vector]
+
+
+def make_handler(dim, latency, error_rate):
+    class Handler(BaseHTTPRequestHandler):
+        stats = {"requests": 0, "rate_limited": 0, "inputs": 0}
+        stats_lock = threading.Lock()
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            time.sleep(latency)
+            with self.stats_lock:
+                self.stats["requests"] += 1
+            if not self.path.rstrip("/").endswith("/embeddings"):
+                self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+                return
+            if random.random() < error_rate:
+                with self.stats_lock:
+                    self.stats["rate_limited"] += 1
+                self._send(429, {"error": {"message": "Rate limit reached (stub)", "type": "rate_limit_error"}})
+                return
+            inputs = request.get("input", [])
+            if not isinstance(inputs, list) or (inputs and isinstance(inputs[0], int)):
+                inputs = [inputs]
+            with self.stats_lock:
+                self.stats["inputs"] += len(inputs)
+            data = []
+            for i, item in enumerate(inputs):
+                vector = fake_vector(item if isinstance(item, str) else json.dumps(item), dim)
+                if request.get("encoding_format") == "base64":
+                    embedding = base64.b64encode(struct.pack(f"<{dim}f", *vector)).decode("ascii")
+                else:
+                    embedding = vector
+                data.append({"object": "embedding", "index": i, "embedding": embedding})
+            self._send(200, {
+                "object": "list",
+                "data": data,
+                "model": request.get("model", "stub"),
+                "usage": {"prompt_tokens": 0, "total_tokens": 0},
+            })
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start_server(port=0, dim=1536, latency=0.05, error_rate=0.0):
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(dim, latency, error_rate))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    args = parser.parse_args()
+    server = start_server(args.port, args.dim, args.latency, args.error_rate)
+    print(f"Stub embedding server on http://127.0.0.1:{server.server_address[1]}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -5,3 +5,39 @@ load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 FAISS_DB_PATH = os.getenv("FAISS_DB_PATH", "faiss_medrisk_index")
 DATA_FOLDER = os.path.join(os.path.dirname(__file__), "..", "data")
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", ".cache/embeddings.sqlite")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+EMBED_REQUESTS_PER_MINUTE = int(os.getenv("EMBED_REQUESTS_PER_MINUTE", "0")) or None
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "6"))
+MODERATION_CACHE_PATH = os.getenv("MODERATION_CACHE_PATH") or None
+MODERATION_CACHE_TTL_SECONDS = int(os.getenv("MODERATION_CACHE_TTL_SECONDS", "86400"))
+MODERATION_CACHE_MAX_ENTRIES = int(os.getenv("MODERATION_CACHE_MAX_ENTRIES", "10000"))
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "0") == "1"  # opt-in: near-duplicate answers can be wrong
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "2000"))
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH") or None
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "5000"))
+QUERY_EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_EMBEDDING_CACHE_MAX_ENTRIES", "4096"))
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "vector")  # "vector" or "hybrid" (BM25 + vector)
+HYBRID_FETCH_K = int(os.getenv("HYBRID_FETCH_K", "20"))
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "flat")  # flat, ivf, hnsw, pq or sq8
+FAISS_RERANK = os.getenv("FAISS_RERANK", "0") == "1"  # exact re-ranking for pq/sq8
+FAISS_NPROBE = int(os.getenv("FAISS_NPROBE", "16"))
+FAISS_EF_SEARCH = int(os.getenv("FAISS_EF_SEARCH", "64"))
+FAISS_RERANK_K_FACTOR = int(os.getenv("FAISS_RERANK_K_FACTOR", "4"))
+FAISS_MMAP = os.getenv("FAISS_MMAP", "1") == "1"  # memory-map index.faiss read-only when serving
+CHAT_HISTORY_WINDOW = int(os.getenv("CHAT_HISTORY_WINDOW", "20"))
+CHAT_HISTORY_PAGE_SIZE = int(os.getenv("CHAT_HISTORY_PAGE_SIZE", "50"))
+CHAT_TRANSCRIPT_MAX_IN_MEMORY = int(os.getenv("CHAT_TRANSCRIPT_MAX_IN_MEMORY", "200"))
+CHAT_TRANSCRIPT_SPILL_PATH = os.getenv("CHAT_TRANSCRIPT_SPILL_PATH") or None  # opt-in, e.g. .cache/transcripts.sqlite
+TRACE_JSONL_PATH = os.getenv("TRACE_JSONL_PATH") or None  # e.g. logs/spans.jsonl
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # serve /metrics on 127.0.0.1 when set
+QA_LOG_FILE = os.getenv("QA_LOG_FILE", "logs/qa.jsonl")
+QA_LOG_MAX_BYTES = int(os.getenv("QA_LOG_MAX_BYTES", str(50 * 1024 * 1024)))
+QA_LOG_BACKUP_COUNT = int(os.getenv("QA_LOG_BACKUP_COUNT", "30"))
+QA_LOG_LIVE_CHAT = os.getenv("QA_LOG_LIVE_CHAT", "0") == "1"  # also log live chat queries and answers
+QA_CHECKPOINT_PATH = os.getenv("QA_CHECKPOINT_PATH", "qa/qa_output/qa_checkpoint.sqlite")
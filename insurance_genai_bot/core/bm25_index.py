@@ -0,0 +1,108 @@
+import math
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+BM25_FILE = "bm25.npz"
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-/][a-z0-9]+)*")
+
+
+def tokenize(text):
+    # Hyphenated terms ("non-admissible") are kept whole and also split into their parts.
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        tokens.append(token)
+        if "-" in token or "/" in token:
+            tokens.extend(part for part in re.split(r"[-/]", token) if part)
+    return tokens
+
+
+class BM25Index:
+    """In-process BM25 inverted index over the knowledge-base chunks.
+
+    Postings are stored CSR-style in flat numpy arrays, with each (term, chunk)
+    BM25 weight precomputed at build time, so a query is a handful of slice
+    additions into a score vector followed by a partial sort.
+    """
+
+    def __init__(self, doc_ids, vocabulary, offsets, postings, weights):
+        self.doc_ids = list(doc_ids)
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.postings = postings
+        self.weights = weights
+
+    @classmethod
+    def build(cls, doc_ids, texts, k1=1.5, b=0.75):
+        term_counts = [Counter(tokenize(text)) for text in texts]
+        lengths = np.array([sum(counts.values()) for counts in term_counts], dtype="float32")
+        avg_length = float(lengths.mean()) if len(lengths) and lengths.mean() > 0 else 1.0
+        by_term = {}
+        for doc, counts in enumerate(term_counts):
+            for term, tf in counts.items():
+                by_term.setdefault(term, []).append((doc, tf))
+        n_docs = len(texts)
+        vocabulary, offsets, postings, weights = {}, [0], [], []
+        for term_id, (term, entries) in enumerate(sorted(by_term.items())):
+            vocabulary[term] = term_id
+            idf = math.log(1 + (n_docs - len(entries) + 0.5) / (len(entries) + 0.5))
+            for doc, tf in entries:
+                norm = k1 * (1 - b + b * lengths[doc] / avg_length)
+                postings.append(doc)
+                weights.append(idf * tf * (k1 + 1) / (tf + norm))
+            offsets.append(len(postings))
+        return cls(
+            doc_ids,
+            vocabulary,
+            np.array(offsets, dtype="int64"),
+            np.array(postings, dtype="int32"),
+            np.array(weights, dtype="float32"),
+        )
+
+    def search(self, query, k=20):
+        """Top-k (doc_id, score) pairs for the query, best first."""
+        term_ids = {self.vocabulary[t] for t in tokenize(query) if t in self.vocabulary}
+        if not term_ids:
+            return []
+        scores = np.zeros(len(self.doc_ids), dtype="float32")
+        for term_id in term_ids:
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            # A term lists each chunk at most once, so fancy-index += is exact.
+            scores[self.postings[start:end]] += self.weights[start:end]
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(scores[matched], -k)[-k:]]
+        ranked = matched[np.argsort(scores[matched])[::-1]]
+        return [(self.doc_ids[i], float(scores[i])) for i in ranked]
+
+    def save(self, folder):
+        # Plain numpy arrays only (terms in term-id order), so loading never unpickles anything.
+        path = os.path.join(folder, BM25_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                doc_ids=np.array(self.doc_ids, dtype=str),
+                terms=np.array(sorted(self.vocabulary, key=self.vocabulary.get), dtype=str),
+                offsets=self.offsets,
+                postings=self.postings,
+                weights=self.weights,
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, folder):
+        path = os.path.join(folder, BM25_FILE)
+        if not os.path.exists(path):
+            return None
+        with np.load(path, allow_pickle=False) as state:
+            return cls(
+                state["doc_ids"].tolist(),
+                {term: i for i, term in enumerate(state["terms"].tolist())},
+                state["offsets"],
+                state["postings"],
+                state["weights"],
+            )
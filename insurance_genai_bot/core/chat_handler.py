@@ -1,5 +1,100 @@
+import time
 import streamlit as st
+from config.env import (
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_PATH,
+    RESPONSE_CACHE_TTL_SECONDS,
+    RESPONSE_CACHE_MAX_ENTRIES,
+    QA_LOG_FILE,
+    QA_LOG_MAX_BYTES,
+    QA_LOG_BACKUP_COUNT,
+    QA_LOG_LIVE_CHAT,
+)
+from core.rag_engine import get_index_version, stream_answer, CHAIN_CONFIG
+from core.response_cache import ResponseCache
+from core.semantic_cache import SemanticCache
 from core.user_input_validation import validate_user_query
+from qa.observability import setup_logger, log_response
+from ui.chat_history import bot_bubble
+
+# Shared by every session in this server process.
+response_cache = ResponseCache(
+    "medrisk", CHAIN_CONFIG, RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_PATH
+)
+semantic_cache = SemanticCache(SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_MAX_ENTRIES)
+# Live chats are only persisted when QA_LOG_LIVE_CHAT is set. Request threads only
+# enqueue; a background thread writes the JSONL file.
+qa_logger = (
+    setup_logger(QA_LOG_FILE, QA_LOG_MAX_BYTES, backup_count=QA_LOG_BACKUP_COUNT) if QA_LOG_LIVE_CHAT else None
+)
+
+
+def _cached_answer(qa_chain, query, index_version):
+    # Exact match first (no embedding call), then semantic match when enabled.
+    cached = response_cache.get(query, index_version)
+    if cached is not None:
+        return cached, None
+    query_vector = None
+    if SEMANTIC_CACHE_ENABLED:
+        query_vector = qa_chain.retriever.vectorstore.embeddings.embed_query(query)
+        # Not copied into the exact cache: a wrong near-match must not become permanent under this key.
+        cached = semantic_cache.lookup(query, query_vector, index_version)
+    return cached, query_vector
+
+
+def _remember_answer(query, query_vector, answer, index_version):
+    if answer and len(answer) >= 10:
+        response_cache.set(query, index_version, answer)
+        if query_vector is not None:
+            semantic_cache.add(query, query_vector, answer, index_version)
+
+
+def stream_query(qa_chain, query):
+    # Yields answer text as it is generated; cache hits arrive as one piece.
+    start = time.perf_counter()
+    index_version = get_index_version()
+    cached, query_vector = _cached_answer(qa_chain, query, index_version)
+    if cached is not None:
+        if qa_logger is not None:
+            log_response(qa_logger, query, cached, None, time.perf_counter() - start, index_version, source="cache")
+        yield cached
+        return
+    first_token = None
+    parts = []
+    for token in stream_answer(qa_chain, query):
+        if first_token is None:
+            first_token = time.perf_counter() - start
+        parts.append(token)
+        yield token
+    total = time.perf_counter() - start
+    print(f"[chat_handler] time to first token {first_token or total:.2f}s, total {total:.2f}s")
+    answer = "".join(parts).strip()
+    _remember_answer(query, query_vector, answer, index_version)
+    if qa_logger is not None:
+        log_response(
+            qa_logger, query, answer, None, total, index_version, source="rag", time_to_first_token=first_token
+        )
+
+
+def respond(qa_chain, user_query, on_token=None):
+    """Answers one validated chat message without touching Streamlit.
+
+    `on_token` receives the answer so far after each streamed token. The load
+    test drives this directly.
+    """
+    answer = ""
+    for token in stream_query(qa_chain, user_query):
+        answer += token
+        if on_token is not None:
+            on_token(answer)
+    answer = answer.strip()
+    # Major QA: Only return real answers, else a fallback
+    if not answer or len(answer) < 10:
+        return "Sorry, no relevant answer found. Please ask another question."
+    return answer
+
 
 def handle_user_query(qa_chain):
     # Session control: Only show input if not closed
@@ -30,17 +125,13 @@ def handle_user_query(qa_chain):
             return
         # Append user message
         st.session_state.chat_history.append(("user", user_query.strip()))
-        with st.spinner("Thinking..."):
-            response = qa_chain.invoke(user_query)
-            answer = response["result"].strip()
-            # Major QA: Only append if valid, else warn
-            if not answer or len(answer) < 10:
-                st.session_state.chat_history.append(
-                    (
-                        "assistant",
-                        "Sorry, no relevant answer found. Please ask another question.",
-                    )
-                )
-            else:
-                st.session_state.chat_history.append(("assistant", answer))
+        # Stream tokens into a live bubble; history gets the complete answer afterwards.
+        placeholder = st.empty()
+        placeholder.markdown(bot_bubble("Thinking..."), unsafe_allow_html=True)
+        answer = respond(
+            qa_chain,
+            user_query,
+            on_token=lambda text: placeholder.markdown(bot_bubble(text + " ▌"), unsafe_allow_html=True),
+        )
+        st.session_state.chat_history.append(("assistant", answer))
         st.rerun()
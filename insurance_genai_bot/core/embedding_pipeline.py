@@ -0,0 +1,121 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import openai
+
+# Transient failures worth backing off on; auth, bad-request and programming errors fail at once.
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1.0):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class EmbeddingPipeline:
+    """Embeds texts in fixed-size batches on a bounded thread pool.
+
+    Each request passes through an optional token-bucket rate limiter, and
+    rate-limit, timeout, connection and 5xx errors are retried with full-jitter
+    exponential backoff. The embedder should be built with max_retries=0 so
+    client retries do not multiply these. `on_batch(texts, vectors)` is
+    called from the caller's thread as batches finish, so completed work can be
+    checkpointed before a later batch fails.
+    """
+
+    def __init__(
+        self,
+        embedder,
+        batch_size=64,
+        concurrency=4,
+        requests_per_minute=None,
+        max_retries=6,
+        base_delay=1.0,
+        max_delay=60.0,
+    ):
+        self.embedder = embedder
+        self.batch_size = max(1, int(batch_size))
+        self.concurrency = max(1, int(concurrency))
+        self.bucket = TokenBucket(requests_per_minute / 60.0) if requests_per_minute else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._stats_lock = threading.Lock()
+        self.last_run = {}
+
+    def _embed_batch(self, texts):
+        for attempt in range(self.max_retries + 1):
+            if self.bucket:
+                self.bucket.acquire()
+            try:
+                return self.embedder.embed_documents(texts)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                with self._stats_lock:
+                    self.last_run["retries"] = self.last_run.get("retries", 0) + 1
+                print(f"[embedding_pipeline] Batch of {len(texts)} failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def embed(self, texts, on_batch=None):
+        texts = list(texts)
+        batches = [
+            (start, texts[start:start + self.batch_size])
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        vectors = [None] * len(texts)
+        self.last_run = {"chunks": len(texts), "batches": len(batches), "retries": 0}
+        errors = []
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = {pool.submit(self._embed_batch, batch): (start, batch) for start, batch in batches}
+            for future in as_completed(futures):
+                start, batch = futures[future]
+                try:
+                    batch_vectors = future.result()
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                vectors[start:start + len(batch)] = batch_vectors
+                if on_batch:
+                    on_batch(batch, batch_vectors)
+        elapsed = time.perf_counter() - start_time
+        done = len(texts) - sum(1 for vector in vectors if vector is None)
+        self.last_run.update(
+            seconds=elapsed,
+            failed_batches=len(errors),
+            chunks_per_second=done / elapsed if elapsed > 0 else 0.0,
+        )
+        print(
+            f"[embedding_pipeline] {done}/{len(texts)} chunks in {elapsed:.2f}s "
+            f"({self.last_run['chunks_per_second']:.1f} chunks/s, {self.last_run['retries']} retries)"
+        )
+        if errors:
+            raise errors[0]
+        return vectors
@@ -0,0 +1,71 @@
+from typing import Any, List
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from utils.tracing import span
+
+
+def reciprocal_rank_fusion(rankings, rrf_k=60):
+    """Fuses ranked id lists: each id scores sum(1 / (rrf_k + rank)) over the lists."""
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (rrf_k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def vector_search_ids(vectorstore, query, k):
+    """Top-k docstore ids from the FAISS index, timed as the "vector_search" span."""
+    vector = np.array([vectorstore.embeddings.embed_query(query)], dtype="float32")
+    with span("vector_search"):
+        _, positions = vectorstore.index.search(vector, k)
+    return [vectorstore.index_to_docstore_id[i] for i in positions[0] if i != -1]
+
+
+def fetch_documents(vectorstore, doc_ids):
+    with span("docstore_fetch"):
+        docs = [vectorstore.docstore.search(doc_id) for doc_id in doc_ids]
+    return [doc for doc in docs if isinstance(doc, Document)]
+
+
+class VectorRetriever(BaseRetriever):
+    """Plain FAISS top-k retrieval that emits the same spans as HybridRetriever."""
+
+    vectorstore: Any
+    k: int = 5
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return fetch_documents(self.vectorstore, vector_search_ids(self.vectorstore, query, self.k))
+
+
+class HybridRetriever(BaseRetriever):
+    """FAISS vector search and BM25 lexical search fused by reciprocal rank.
+
+    Both sides return `fetch_k` docstore ids; the fused top `k` are read back
+    from the vector store's docstore. `vectorstore` is exposed under the same
+    name as on the plain FAISS retriever, so callers can reach its embeddings.
+    """
+
+    vectorstore: Any
+    bm25: Any
+    k: int = 5
+    fetch_k: int = 20
+    rrf_k: int = 60
+
+    def vector_ids(self, query):
+        return vector_search_ids(self.vectorstore, query, self.fetch_k)
+
+    def lexical_ids(self, query):
+        with span("bm25_search"):
+            return [doc_id for doc_id, _ in self.bm25.search(query, self.fetch_k)]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        fused = reciprocal_rank_fusion([self.vector_ids(query), self.lexical_ids(query)], self.rrf_k)
+        return fetch_documents(self.vectorstore, fused[: self.k])
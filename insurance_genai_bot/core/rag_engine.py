@@ -1,46 +1,384 @@
+import json
 import os
+import threading
+import time
 from langchain_openai import OpenAIEmbeddings, ChatOpenAI
-from langchain_community.vectorstores import FAISS
 from langchain_community.document_loaders import PyPDFLoader, UnstructuredExcelLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.chains import RetrievalQA
-from config.env import OPENAI_API_KEY, FAISS_DB_PATH
+from langchain_core.prompts import format_document
+from config.env import (
+    OPENAI_API_KEY,
+    FAISS_DB_PATH,
+    DATA_FOLDER,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    EMBED_BATCH_SIZE,
+    EMBED_CONCURRENCY,
+    EMBED_REQUESTS_PER_MINUTE,
+    EMBED_MAX_RETRIES,
+    QUERY_EMBEDDING_CACHE_MAX_ENTRIES,
+    RETRIEVAL_MODE,
+    HYBRID_FETCH_K,
+    HYBRID_RRF_K,
+    FAISS_INDEX_TYPE,
+    FAISS_RERANK,
+    FAISS_NPROBE,
+    FAISS_EF_SEARCH,
+    FAISS_RERANK_K_FACTOR,
+    FAISS_MMAP,
+)
+from core.bm25_index import BM25Index, BM25_FILE
+from core.embedding_cache import CachedEmbeddings, QueryCachedEmbeddings, QueryEmbeddingLRU
+from core.embedding_pipeline import EmbeddingPipeline
+from core.hybrid_retriever import HybridRetriever, VectorRetriever
+from core.tfidf_index import CorpusTfidf, TFIDF_FILE
+from core import vector_store
+from core.vector_store import (
+    build_vectorstore,
+    configure_search,
+    docstore_exists,
+    index_description,
+    load_vectorstore,
+    save_vectorstore,
+    supports_incremental,
+)
+from utils.file_ops import list_data_files, fingerprint_paths, cached_file_sha256
+from utils.tracing import span, tracer
 
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 80
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 2
+LLM_MODEL = "gpt-3.5-turbo"
+LLM_TEMPERATURE = 0
+RETRIEVER_K = 5
+# Identifies answer-affecting chain settings for the response caches.
+CHAIN_CONFIG = f"{LLM_MODEL}|temperature={LLM_TEMPERATURE}|k={RETRIEVER_K}|chunks={CHUNK_SIZE}/{CHUNK_OVERLAP}|retrieval={RETRIEVAL_MODE}"
 
-def build_faiss_index(pdf_files, excel_files):
-    documents = []
-    for pdf in pdf_files:
-        docs = PyPDFLoader(pdf).load()
-        documents.extend(docs)
-    for xl in excel_files:
-        docs = UnstructuredExcelLoader(xl).load()
-        documents.extend(docs)
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=80)
-    split_docs = text_splitter.split_documents(documents)
-    embeddings = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
-    if not os.path.exists(FAISS_DB_PATH):
-        faiss_index = FAISS.from_documents(split_docs, embeddings)
-        faiss_index.save_local(FAISS_DB_PATH)
+# Query vectors outlive chain rebuilds: they depend only on the model and text.
+query_embedding_lru = QueryEmbeddingLRU(QUERY_EMBEDDING_CACHE_MAX_ENTRIES)
+
+# One chain per server process, shared by every session and rerun.
+_chain_lock = threading.Lock()
+_chain_state = {
+    "chain": None,
+    "fingerprint": None,
+    "rebuilds": 0,
+    "last_build_seconds": 0.0,
+    "total_build_seconds": 0.0,
+    "last_built_at": None,
+}
+
+
+def load_file_documents(path):
+    if path.lower().endswith(".pdf"):
+        docs = PyPDFLoader(path).load()
     else:
-        faiss_index = FAISS.load_local(
-            FAISS_DB_PATH, embeddings, allow_dangerous_deserialization=True
+        docs = UnstructuredExcelLoader(path).load()
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    return text_splitter.split_documents(docs)
+
+
+def chunk_ids(name, sha256, count):
+    # Deterministic docstore IDs, so the manifest can find a file's vectors again.
+    return [f"{name}:{sha256[:16]}:{i}" for i in range(count)]
+
+
+def index_params(embeddings):
+    # Anything that changes the chunks or their vectors invalidates the index.
+    return {
+        "manifest_version": MANIFEST_VERSION,
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "embedding_model": getattr(embeddings, "model", type(embeddings).__name__),
+        "index_type": FAISS_INDEX_TYPE,
+        "rerank": FAISS_RERANK,
+    }
+
+
+def built_index_description(n_vectors, dim):
+    # The factory string build_vectorstore chooses, e.g. "Flat" for an "ivf" corpus too small to train.
+    return index_description(FAISS_INDEX_TYPE, n_vectors, dim, FAISS_RERANK)
+
+
+def source_entries(files):
+    return {
+        os.path.basename(path): {"sha256": cached_file_sha256(path), "size": os.path.getsize(path)}
+        for path in files
+    }
+
+
+def load_manifest(db_path=FAISS_DB_PATH):
+    path = os.path.join(db_path, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[rag_engine] Ignoring unreadable manifest {path}: {e}")
+        return None
+
+
+def save_manifest(manifest, db_path=FAISS_DB_PATH):
+    path = os.path.join(db_path, MANIFEST_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def get_index_version(db_path=FAISS_DB_PATH):
+    # Changes whenever the index is rebuilt or updated, since the manifest is rewritten.
+    path = os.path.join(db_path, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return "unversioned"
+    return cached_file_sha256(path)[:16]
+
+
+def index_files_exist(db_path=FAISS_DB_PATH):
+    return os.path.exists(os.path.join(db_path, "index.faiss")) and docstore_exists(db_path)
+
+
+def make_embeddings():
+    base = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
+    pipeline = EmbeddingPipeline(
+        # The pipeline does its own backoff; client retries on top would multiply calls per batch.
+        OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY, max_retries=0),
+        batch_size=EMBED_BATCH_SIZE,
+        concurrency=EMBED_CONCURRENCY,
+        requests_per_minute=EMBED_REQUESTS_PER_MINUTE,
+        max_retries=EMBED_MAX_RETRIES,
+    )
+    return CachedEmbeddings(base, EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ENTRIES, pipeline=pipeline)
+
+
+def _load_chunks(paths, sources):
+    # Load and split only `paths`, recording each file's chunk IDs in `sources`.
+    docs, ids = [], []
+    for path in paths:
+        name = os.path.basename(path)
+        file_docs = load_file_documents(path)
+        file_ids = chunk_ids(name, sources[name]["sha256"], len(file_docs))
+        sources[name]["ids"] = file_ids
+        docs.extend(file_docs)
+        ids.extend(file_ids)
+    return docs, ids
+
+
+def _embed_chunks(docs, ids, embeddings, faiss_index=None):
+    if not docs:
+        return faiss_index
+    # Embed every new chunk in one pipeline run so batches overlap across files.
+    texts = [doc.page_content for doc in docs]
+    text_embeddings = list(zip(texts, embeddings.embed_documents(texts)))
+    metadatas = [doc.metadata for doc in docs]
+    if faiss_index is None:
+        return build_vectorstore(
+            text_embeddings, embeddings, metadatas, ids, index_type=FAISS_INDEX_TYPE, rerank=FAISS_RERANK
         )
+    faiss_index.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
     return faiss_index
 
 
-def get_rag_chain():
-    from config.env import DATA_FOLDER
-    from utils.file_ops import list_data_files
+def _embed_files(paths, sources, embeddings, faiss_index=None):
+    docs, ids = _load_chunks(paths, sources)
+    return _embed_chunks(docs, ids, embeddings, faiss_index)
+
+
+def plan_update(files, sources, indexed):
+    # Files to re-embed and the chunk IDs they (or deleted files) leave behind.
+    changed = []
+    stale_ids = []
+    for path in files:
+        name = os.path.basename(path)
+        previous = indexed.get(name)
+        if previous and previous["sha256"] == sources[name]["sha256"]:
+            sources[name]["ids"] = previous.get("ids", [])
+            continue
+        changed.append(path)
+        if previous:
+            stale_ids.extend(previous.get("ids", []))
+    for name, previous in indexed.items():
+        if name not in sources:
+            stale_ids.extend(previous.get("ids", []))
+    return changed, stale_ids
+
+
+def update_faiss_index(faiss_index, changed, stale_ids, docs, ids, embeddings):
+    if stale_ids:
+        faiss_index.delete(stale_ids)
+    print(f"[rag_engine] Incremental update: {len(changed)} file(s) to embed, {len(stale_ids)} stale chunk(s) removed")
+    return _embed_chunks(docs, ids, embeddings, faiss_index)
+
+
+def docstore_items(faiss_index):
+    return [
+        (doc_id, faiss_index.docstore.search(doc_id).page_content)
+        for doc_id in faiss_index.index_to_docstore_id.values()
+    ]
 
+
+def docstore_texts(faiss_index):
+    return [text for _, text in docstore_items(faiss_index)]
+
+
+def save_corpus_tfidf(faiss_index, db_path=FAISS_DB_PATH):
+    # Fitted over the same chunks as the index, for the QA semantic checks.
+    CorpusTfidf.fit(docstore_texts(faiss_index)).save(db_path)
+
+
+def save_bm25_index(faiss_index, db_path=FAISS_DB_PATH):
+    # Keyed by docstore id so lexical hits fuse directly with vector hits.
+    doc_ids, texts = zip(*docstore_items(faiss_index)) if faiss_index.index_to_docstore_id else ((), ())
+    bm25 = BM25Index.build(doc_ids, texts)
+    bm25.save(db_path)
+    return bm25
+
+
+def load_bm25_index(faiss_index, db_path=FAISS_DB_PATH):
+    bm25 = BM25Index.load(db_path)
+    return bm25 if bm25 is not None else save_bm25_index(faiss_index, db_path)
+
+
+def make_retriever(faiss_index):
+    if RETRIEVAL_MODE == "vector":
+        return VectorRetriever(vectorstore=faiss_index, k=RETRIEVER_K)
+    return HybridRetriever(
+        vectorstore=faiss_index,
+        bm25=load_bm25_index(faiss_index),
+        k=RETRIEVER_K,
+        fetch_k=HYBRID_FETCH_K,
+        rrf_k=HYBRID_RRF_K,
+    )
+
+
+def build_faiss_index(pdf_files, excel_files):
+    document_embeddings = make_embeddings()
+    embeddings = QueryCachedEmbeddings(document_embeddings, query_embedding_lru)
+    params = index_params(embeddings)
+    files = pdf_files + excel_files
+    sources = source_entries(files)
+    manifest = load_manifest()
+    if manifest and index_files_exist() and manifest.get("params") == params:
+        indexed = manifest.get("files", {})
+        current = {
+            name: {"sha256": entry["sha256"], "size": entry["size"]}
+            for name, entry in indexed.items()
+        }
+        if current == sources:
+            # Index is current: skip loading and splitting the corpus entirely, and
+            # serve it read-only so workers can share the memory-mapped vectors.
+            faiss_index = load_vectorstore(FAISS_DB_PATH, embeddings, mmap=FAISS_MMAP)
+            configure_search(faiss_index.index, FAISS_NPROBE, FAISS_EF_SEARCH, FAISS_RERANK_K_FACTOR)
+            if not os.path.exists(os.path.join(FAISS_DB_PATH, TFIDF_FILE)):
+                save_corpus_tfidf(faiss_index)
+            if not os.path.exists(os.path.join(FAISS_DB_PATH, BM25_FILE)):
+                save_bm25_index(faiss_index)
+            return faiss_index
+        faiss_index = load_vectorstore(FAISS_DB_PATH, embeddings, writable=True)
+        changed, stale_ids = plan_update(files, sources, indexed)
+        docs, ids = _load_chunks(changed, sources)
+        # Judge the index at its size after this update, so a Flat fallback that
+        # outgrows MIN_TRAINING_VECTORS now is rebuilt now, not on the next run.
+        n_after = faiss_index.index.ntotal - len(stale_ids) + len(docs)
+        built = manifest.get("index")
+        if built == built_index_description(n_after, faiss_index.index.d) and supports_incremental(faiss_index.index):
+            faiss_index = update_faiss_index(faiss_index, changed, stale_ids, docs, ids, embeddings)
+        else:
+            # Trained/graph indexes cannot drop vectors in place, and a Flat fallback is
+            # replaced once the corpus is large enough to train; cached embeddings keep this cheap.
+            print(f"[rag_engine] {built or 'unrecorded'} index cannot be updated in place; rebuilding")
+            unchanged_docs, unchanged_ids = _load_chunks([path for path in files if path not in changed], sources)
+            faiss_index = _embed_chunks(unchanged_docs + docs, unchanged_ids + ids, embeddings)
+            built = built_index_description(faiss_index.index.ntotal, faiss_index.index.d)
+    else:
+        faiss_index = _embed_files(files, sources, embeddings)
+        if faiss_index is None:
+            raise ValueError(f"No indexable documents found in {DATA_FOLDER}")
+        built = built_index_description(faiss_index.index.ntotal, faiss_index.index.d)
+    configure_search(faiss_index.index, FAISS_NPROBE, FAISS_EF_SEARCH, FAISS_RERANK_K_FACTOR)
+    print(f"[rag_engine] Embedding cache: {document_embeddings.stats()}")
+    save_vectorstore(faiss_index, FAISS_DB_PATH)
+    save_corpus_tfidf(faiss_index)
+    save_bm25_index(faiss_index)
+    save_manifest({"params": params, "files": sources, "index": built})
+    return faiss_index
+
+
+def make_llm():
+    return ChatOpenAI(
+        openai_api_key=OPENAI_API_KEY, model=LLM_MODEL, temperature=LLM_TEMPERATURE
+    )
+
+
+def build_rag_chain():
     pdfs, excels = list_data_files(DATA_FOLDER)
     faiss_index = build_faiss_index(pdfs, excels)
-    llm = ChatOpenAI(
-        openai_api_key=OPENAI_API_KEY, model="gpt-3.5-turbo", temperature=0
-    )
+    llm = make_llm()
     qa_chain = RetrievalQA.from_chain_type(
         llm=llm,
         chain_type="stuff",
-        retriever=faiss_index.as_retriever(search_kwargs={"k": 5}),
+        retriever=make_retriever(faiss_index),
         return_source_documents=True,
     )
     return qa_chain
+
+
+def stream_answer(qa_chain, query):
+    # Same retriever and "stuff" prompt as qa_chain.invoke, but yields LLM tokens as they arrive.
+    with span("retrieval"):
+        docs = qa_chain.retriever.invoke(query)
+    combine = qa_chain.combine_documents_chain
+    context = combine.document_separator.join(
+        format_document(doc, combine.document_prompt) for doc in docs
+    )
+    prompt = combine.llm_chain.prompt.format_prompt(
+        **{combine.document_variable_name: context, "question": query}
+    )
+    start = time.perf_counter()
+    first_token = False
+    try:
+        for chunk in combine.llm_chain.llm.stream(prompt):
+            text = chunk.content if hasattr(chunk, "content") else str(chunk)
+            if text:
+                if not first_token:
+                    first_token = True
+                    tracer.record("llm_first_token", time.perf_counter() - start)
+                yield text
+    finally:
+        tracer.record("llm", time.perf_counter() - start)
+
+
+def get_rag_chain():
+    # Reuse the process-wide chain unless the data folder or index changed on disk.
+    fingerprint = fingerprint_paths(DATA_FOLDER, FAISS_DB_PATH)
+    with _chain_lock:
+        if _chain_state["chain"] is None or _chain_state["fingerprint"] != fingerprint:
+            start = time.perf_counter()
+            chain = build_rag_chain()
+            elapsed = time.perf_counter() - start
+            _chain_state["chain"] = chain
+            # Fingerprint again: building may itself create or rewrite the index.
+            _chain_state["fingerprint"] = fingerprint_paths(DATA_FOLDER, FAISS_DB_PATH)
+            _chain_state["rebuilds"] += 1
+            _chain_state["last_build_seconds"] = elapsed
+            _chain_state["total_build_seconds"] += elapsed
+            _chain_state["last_built_at"] = time.time()
+            print(f"[rag_engine] RAG chain build #{_chain_state['rebuilds']} took {elapsed:.2f}s")
+        return _chain_state["chain"]
+
+
+def get_rag_chain_stats():
+    with _chain_lock:
+        return {k: v for k, v in _chain_state.items() if k != "chain"}
+
+
+def get_query_embedding_stats():
+    return query_embedding_lru.stats()
+
+
+def get_index_load_stats():
+    # Load time, mmap status and process memory of the last read-only index load.
+    return dict(vector_store.last_load)
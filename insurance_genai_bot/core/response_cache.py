@@ -0,0 +1,48 @@
+import hashlib
+import re
+
+from utils.ttl_cache import TTLCache
+
+
+def normalize_query(query):
+    # Case-, whitespace- and punctuation-insensitive form of a question.
+    text = re.sub(r"[^\w\s]", " ", (query or "").lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+# Filler words that do not change what is being asked. Negations ("not", "no",
+# "without") and single letters (plan "A" vs plan "B") are deliberately kept.
+QUERY_STOPWORDS = frozenset(
+    "the an is are was were be do does did what whats which how can could i my me we our you your "
+    "of for to in on at by it this that there please tell about s".split()
+)
+
+
+def query_terms(query):
+    """Content words of a question; two questions with different terms are never the same question."""
+    return frozenset(word for word in normalize_query(query).split() if word not in QUERY_STOPWORDS)
+
+
+class ResponseCache:
+    """Exact-match answers keyed by (normalized query, chain config, index version).
+
+    Backed by an in-process LRU, or by a SQLite file shared across Streamlit
+    worker processes when `path` is set. Entries expire after `ttl_seconds`.
+    """
+
+    def __init__(self, bot, chain_config, max_entries=5000, ttl_seconds=3600, path=None):
+        self.chain_config = chain_config
+        self.cache = TTLCache(f"responses:{bot}", max_entries, ttl_seconds, path)
+
+    def _key(self, query, index_version):
+        raw = f"{normalize_query(query)}\x1f{self.chain_config}\x1f{index_version}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, query, index_version):
+        return self.cache.get(self._key(query, index_version))
+
+    def set(self, query, index_version, answer):
+        self.cache.set(self._key(query, index_version), answer)
+
+    def stats(self):
+        return self.cache.stats()
@@ -0,0 +1,87 @@
+import threading
+from collections import OrderedDict
+
+import faiss
+import numpy as np
+
+from core.response_cache import query_terms
+
+# Nearest stored queries checked for a term match before giving up.
+CANDIDATES = 4
+
+
+class SemanticCache:
+    """Answers for near-duplicate queries, looked up by query-embedding similarity.
+
+    Query vectors live in a small inner-product FAISS index over L2-normalised
+    vectors, so scores are cosine similarities. Embeddings barely move for
+    negations or a different plan name, so a hit also needs the same content
+    words (`query_terms`); similarity alone only tolerates rephrasing. Entries
+    belong to one index version: a re-ingest drops them all. Capacity is
+    bounded with LRU eviction.
+    """
+
+    def __init__(self, threshold=0.95, max_entries=2000):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._index = None
+        self._entries = OrderedDict()
+        self._version = None
+        self._next_id = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _as_matrix(vector):
+        matrix = np.asarray(vector, dtype="float32").reshape(1, -1).copy()
+        faiss.normalize_L2(matrix)
+        return matrix
+
+    def _reset(self, index_version, dim=None):
+        self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim)) if dim else None
+        self._entries.clear()
+        self._version = index_version
+
+    def lookup(self, query, query_vector, index_version):
+        matrix = self._as_matrix(query_vector)
+        terms = query_terms(query)
+        with self._lock:
+            if index_version != self._version:
+                self._reset(index_version)
+            if not self._entries:
+                self.misses += 1
+                return None
+            scores, ids = self._index.search(matrix, min(CANDIDATES, len(self._entries)))
+            for entry_id, score in zip(ids[0].tolist(), scores[0].tolist()):
+                if entry_id == -1 or score < self.threshold:
+                    break
+                if self._entries[entry_id]["terms"] == terms:
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    return self._entries[entry_id]["answer"]
+            self.misses += 1
+            return None
+
+    def add(self, query, query_vector, answer, index_version):
+        matrix = self._as_matrix(query_vector)
+        with self._lock:
+            if index_version != self._version or self._index is None:
+                self._reset(index_version, matrix.shape[1])
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(matrix, np.array([entry_id], dtype="int64"))
+            self._entries[entry_id] = {"query": query, "terms": query_terms(query), "answer": answer}
+            while len(self._entries) > self.max_entries:
+                evicted_id, _ = self._entries.popitem(last=False)
+                self._index.remove_ids(np.array([evicted_id], dtype="int64"))
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "index_version": self._version,
+        }
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# Vocabulary, idf and chunk keys as JSON; written last, so its presence means the model is complete.
+TFIDF_FILE = "tfidf.json"
+TFIDF_MATRIX_FILE = "tfidf_matrix.npz"
+
+
+def _text_key(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CorpusTfidf:
+    """TF-IDF vectorizer fitted once over the knowledge-base chunks.
+
+    Chunk vectors are precomputed as an L2-normalised sparse matrix, so cosine
+    similarity is a dot product and many answers score in one matrix product.
+    """
+
+    def __init__(self, vectorizer, chunk_matrix, chunk_keys):
+        self.vectorizer = vectorizer
+        self.chunk_matrix = chunk_matrix.tocsr()
+        self.row_by_key = {key: i for i, key in enumerate(chunk_keys)}
+
+    @classmethod
+    def fit(cls, texts):
+        vectorizer = TfidfVectorizer()
+        matrix = vectorizer.fit_transform(texts)
+        return cls(vectorizer, matrix, [_text_key(text) for text in texts])
+
+    def save(self, folder):
+        # Plain arrays and JSON only, so loading never unpickles anything.
+        matrix_path = os.path.join(folder, TFIDF_MATRIX_FILE)
+        with open(matrix_path + ".tmp", "wb") as f:
+            sparse.save_npz(f, self.chunk_matrix)
+        vocabulary = self.vectorizer.vocabulary_
+        state = {
+            "terms": sorted(vocabulary, key=vocabulary.get),
+            "idf": self.vectorizer.idf_.tolist(),
+            "chunk_keys": list(self.row_by_key),
+        }
+        path = os.path.join(folder, TFIDF_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(matrix_path + ".tmp", matrix_path)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, folder):
+        path = os.path.join(folder, TFIDF_FILE)
+        matrix_path = os.path.join(folder, TFIDF_MATRIX_FILE)
+        if not (os.path.exists(path) and os.path.exists(matrix_path)):
+            return None
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+        vectorizer = TfidfVectorizer(vocabulary={term: i for i, term in enumerate(state["terms"])})
+        vectorizer.idf_ = np.asarray(state["idf"], dtype="float64")
+        chunk_matrix = sparse.load_npz(matrix_path)
+        return cls(vectorizer, chunk_matrix, state["chunk_keys"])
+
+    def doc_vectors(self, docs):
+        # Known KB chunks reuse their precomputed rows; only unseen text is tokenized.
+        rows = [self.row_by_key.get(_text_key(doc)) for doc in docs]
+        unseen = [doc for doc, row in zip(docs, rows) if row is None]
+        unseen_matrix = self.vectorizer.transform(unseen) if unseen else None
+        parts, next_unseen = [], 0
+        for row in rows:
+            if row is None:
+                parts.append(unseen_matrix[next_unseen])
+                next_unseen += 1
+            else:
+                parts.append(self.chunk_matrix[row])
+        return sparse.vstack(parts).tocsr()
+
+    def _grouped(self, answers, docs_per_answer):
+        # One transform for all answers and one for all distinct docs.
+        answer_matrix = self.vectorizer.transform(answers)
+        unique_docs = list(dict.fromkeys(doc for docs in docs_per_answer for doc in docs))
+        position = {doc: i for i, doc in enumerate(unique_docs)}
+        doc_matrix = self.doc_vectors(unique_docs) if unique_docs else None
+        groups = [[position[doc] for doc in docs] for docs in docs_per_answer]
+        return answer_matrix, doc_matrix, groups
+
+    def best_similarity(self, answers, docs_per_answer=None):
+        """Best cosine similarity of each answer to its docs (default: every KB chunk)."""
+        if docs_per_answer is None:
+            sims = self.vectorizer.transform(answers) @ self.chunk_matrix.T
+            return sims.max(axis=1).toarray().ravel()
+        answer_matrix, doc_matrix, groups = self._grouped(answers, docs_per_answer)
+        if doc_matrix is None:
+            return np.zeros(len(answers))
+        sims = (answer_matrix @ doc_matrix.T).toarray()
+        return np.array([sims[i, group].max() if group else 0.0 for i, group in enumerate(groups)])
+
+    def centroid_similarity(self, answers, docs_per_answer):
+        """Cosine similarity of each answer to the normalised centroid of its docs."""
+        answer_matrix, doc_matrix, groups = self._grouped(answers, docs_per_answer)
+        if doc_matrix is None:
+            return np.zeros(len(answers))
+        # Sparse (answers x docs) membership matrix turns every centroid into one product.
+        membership = sparse.csr_matrix(
+            (
+                np.ones(sum(len(group) for group in groups)),
+                ([i for i, group in enumerate(groups) for _ in group], [j for group in groups for j in group]),
+            ),
+            shape=(len(answers), doc_matrix.shape[0]),
+        )
+        centroids = membership @ doc_matrix
+        norms = np.sqrt(centroids.multiply(centroids).sum(axis=1)).A.ravel()
+        norms[norms == 0] = 1.0
+        dots = np.asarray(answer_matrix.multiply(centroids).sum(axis=1)).ravel()
+        return dots / norms
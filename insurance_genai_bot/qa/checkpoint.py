@@ -0,0 +1,89 @@
+import json
+import os
+import sqlite3
+import time
+
+
+class RunCheckpoint:
+    """Completed QA rows of one batch run, stored in SQLite as they finish.
+
+    Rows are keyed by (run_id, sheet, sheet_row), the question's row within its
+    sheet, so a question repeated in a sheet keeps every row. Each row also
+    keeps its position in the question workbook, so an interrupted run can skip
+    what is done and the report can be rebuilt in input order from the
+    checkpoint alone. Error rows are stored too, but do not count as done, so a
+    resume retries them.
+    """
+
+    def __init__(self, path, run_id):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.path = path
+        self.run_id = run_id
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " run_id TEXT PRIMARY KEY, input_excel TEXT, checks TEXT, created_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sheet_rows ("
+            " run_id TEXT NOT NULL, sheet TEXT NOT NULL, sheet_row INTEGER NOT NULL, question TEXT NOT NULL,"
+            " position INTEGER NOT NULL, status TEXT NOT NULL, row TEXT NOT NULL, created_at REAL NOT NULL,"
+            " PRIMARY KEY (run_id, sheet, sheet_row))"
+        )
+        self._conn.commit()
+
+    def start(self, input_excel, checks):
+        self._conn.execute(
+            "INSERT OR IGNORE INTO runs VALUES (?, ?, ?, ?)",
+            (self.run_id, input_excel, json.dumps(checks), time.time()),
+        )
+        self._conn.commit()
+
+    def done(self):
+        """{(sheet, sheet_row): question} already answered in this run; error rows are not done."""
+        rows = self._conn.execute(
+            "SELECT sheet, sheet_row, question FROM sheet_rows WHERE run_id = ? AND status != 'Error'", (self.run_id,)
+        )
+        return {(sheet, sheet_row): question for sheet, sheet_row, question in rows}
+
+    def failed(self):
+        """Number of questions whose latest attempt in this run ended in an error."""
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM sheet_rows WHERE run_id = ? AND status = 'Error'", (self.run_id,)
+        ).fetchone()[0]
+
+    def add(self, position, sheet, sheet_row, question, row):
+        # Committed per row; a retried error row is replaced by the new attempt.
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sheet_rows VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                self.run_id, sheet, sheet_row, question, position, row.get("Status", ""),
+                json.dumps(row, default=str), time.time(),
+            ),
+        )
+        self._conn.commit()
+
+    def rows(self):
+        """Result rows in question-workbook order."""
+        cursor = self._conn.execute("SELECT row FROM sheet_rows WHERE run_id = ? ORDER BY position", (self.run_id,))
+        for (row,) in cursor:
+            yield json.loads(row)
+
+    def close(self):
+        self._conn.close()
+
+
+def latest_run_id(path):
+    """The most recently started run in the checkpoint file, or None."""
+    if not os.path.exists(path):
+        return None
+    conn = sqlite3.connect(path)
+    try:
+        row = conn.execute("SELECT run_id FROM runs ORDER BY created_at DESC LIMIT 1").fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    conn.close()
+    return row[0] if row else None
@@ -1,20 +1,118 @@
+import atexit
+import glob
+import json
 import logging
 import os
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 
-def setup_logger(log_file="logs/qa.log"):
+DEFAULT_LOG_FILE = "logs/qa.jsonl"
+_listeners = {}
+
+
+class SizedTimedRotatingFileHandler(TimedRotatingFileHandler):
+    """Rolls over at the time boundary (`when`) or once the file reaches `max_bytes`.
+
+    Several rollovers in one period get numbered suffixes (qa.jsonl.2024-05-01.1, ...)
+    instead of overwriting each other.
+    """
+
+    def __init__(self, filename, max_bytes=50 * 1024 * 1024, when="midnight", backup_count=30):
+        super().__init__(filename, when=when, backupCount=backup_count, encoding="utf-8", utc=True)
+        self.max_bytes = max_bytes
+
+    def shouldRollover(self, record):
+        if super().shouldRollover(record):
+            return True
+        if self.max_bytes and self.stream is not None:
+            return self.stream.tell() + len(self.format(record)) + 1 >= self.max_bytes
+        return False
+
+    def rotation_filename(self, default_name):
+        name, n = default_name, 0
+        while os.path.exists(name):
+            n += 1
+            name = f"{default_name}.{n}"
+        return name
+
+
+class JsonLineFormatter(logging.Formatter):
+    # One JSON object per line; dict messages become the record's fields.
+    def format(self, record):
+        fields = record.msg if isinstance(record.msg, dict) else {"message": record.getMessage()}
+        return json.dumps(fields, ensure_ascii=False, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Enqueues records untouched: formatting and file I/O happen on the listener thread.
+
+    When the queue is full the record is dropped and counted rather than blocking the caller.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logger(log_file=DEFAULT_LOG_FILE, max_bytes=50 * 1024 * 1024, when="midnight", backup_count=30, max_queue=10000):
     # Make sure the logs directory exists!
     log_dir = os.path.dirname(log_file)
     if log_dir and not os.path.exists(log_dir):
         os.makedirs(log_dir)
-    logger = logging.getLogger("qa_logger")
+    logger = logging.getLogger(f"qa_logger.{os.path.abspath(log_file)}")
     logger.setLevel(logging.INFO)
-    handler = logging.FileHandler(log_file)
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    handler.setFormatter(formatter)
-    if not logger.handlers:
-        logger.addHandler(handler)
+    logger.propagate = False
+    if log_file not in _listeners:
+        file_handler = SizedTimedRotatingFileHandler(log_file, max_bytes, when, backup_count)
+        file_handler.setFormatter(JsonLineFormatter())
+        log_queue = queue.Queue(maxsize=max_queue)
+        listener = QueueListener(log_queue, file_handler)
+        listener.start()
+        # Drain whatever is still queued when the process exits.
+        atexit.register(listener.stop)
+        _listeners[log_file] = listener
+        logger.addHandler(NonBlockingQueueHandler(log_queue))
     return logger
 
 
-def log_response(logger, user_query, answer, checks):
-    logger.info(f"QUERY: {user_query}\nANSWER: {answer}\nCHECKS: {checks}")
+def log_response(logger, user_query, answer, checks, latency=None, index_version=None, **extra):
+    logger.info(
+        {
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "query": user_query,
+            "answer": answer,
+            "checks": checks,
+            "latency": latency,
+            "index_version": index_version,
+            **extra,
+        }
+    )
+
+
+def load_qa_logs(log_file=DEFAULT_LOG_FILE, day=None):
+    """Reads the JSONL log (and its rotated files) into a DataFrame; `day` is 'YYYY-MM-DD' in UTC."""
+    import pandas as pd
+
+    paths = sorted(glob.glob(glob.escape(log_file) + ".*")) + [log_file]
+    if day:
+        # Rotated files are named after the period they cover; the live file may hold any day.
+        suffix_start = len(log_file) + 1
+        paths = [p for p in paths if p == log_file or p[suffix_start:].startswith(day)]
+    frames = [pd.read_json(p, lines=True, dtype=False) for p in paths if os.path.exists(p) and os.path.getsize(p)]
+    if not frames:
+        return pd.DataFrame(columns=["ts", "query", "answer", "checks", "latency", "index_version"])
+    df = pd.concat(frames, ignore_index=True)
+    df["ts"] = pd.to_datetime(df["ts"], utc=True)
+    if day:
+        df = df[df["ts"].dt.strftime("%Y-%m-%d") == day]
+    return df.sort_values("ts", ignore_index=True)
@@ -1,9 +1,10 @@
 import time
 
 def measure_latency(fn, *args, **kwargs):
-    start = time.time()
+    # Monotonic, high-resolution clock: immune to wall-clock adjustments
+    start = time.perf_counter()
     result = fn(*args, **kwargs)
-    latency = time.time() - start
+    latency = time.perf_counter() - start
     return result, latency
 
 def check_prompt_success(response):
@@ -2,22 +2,28 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import os
-import sys
-import pandas as pd
+import uuid
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import pytz
 
 from utils.excel_loader import load_questions_from_excel_all_sheets
-from qa.response_quality import response_quality_checks, get_response_quality_columns
+from qa.response_quality import response_quality_checks, get_response_quality_columns, moderation_check_batch, select_checks, MODERATION_BATCH_SIZE
 from qa.pipeline_health import health_report
+from qa.observability import setup_logger, log_response
+from qa.result_writer import open_result_writer, RESULT_FORMATS
+from qa.checkpoint import RunCheckpoint, latest_run_id
+from config.env import QA_LOG_FILE, QA_LOG_MAX_BYTES, QA_LOG_BACKUP_COUNT, QA_CHECKPOINT_PATH
 
 def get_ist_now():
     ist = pytz.timezone('Asia/Kolkata')
     return datetime.now(ist)
 
-def get_bot_response(query):
-    from core.rag_engine import get_rag_chain
-    qa_chain = get_rag_chain()
+def get_bot_response(query, qa_chain=None):
+    if qa_chain is None:
+        from core.rag_engine import get_rag_chain
+        qa_chain = get_rag_chain()
     response = qa_chain.invoke(query)
     return response["result"] if isinstance(response, dict) else str(response)
 
@@ -26,73 +32,137 @@ def ensure_folder(folder):
         os.makedirs(folder)
 
 def critical_pass(checks):
-    # Adjust criteria as needed for "Pass"
+    # Adjust criteria as needed for "Pass"; checks that were not run cannot fail a row
     if (checks.get("Non-empty", "").startswith("Empty") or
         ("PII" in checks.get("PII Check", "") and "detected" in checks.get("PII Check", "") and checks.get("PII Check", "") != "No PII detected") or
-        checks.get("Moderation", "") != "No Moderation Flagged (PASS)" or ("(LOW)" in str(checks.get("Semantic No Hallucination", ""))) or
+        checks.get("Moderation", "No Moderation Flagged (PASS)") != "No Moderation Flagged (PASS)" or ("(LOW)" in str(checks.get("Semantic No Hallucination", ""))) or
         ("FAIL" in str(checks.get("Keyword Hallucination", ""))) or ("FAIL" in str(checks.get("Relevance", "")))):
         return False
     return True
 
-def main(input_excel):
+def answer_question(qa_chain, sheet, question):
+    dt = get_ist_now()
+    # Latency is timed inside the worker, so it covers only this question's call.
+    # A failure (e.g. a 429) becomes an error row instead of aborting the other questions.
+    try:
+        h = health_report(get_bot_response, question, qa_chain)
+    except Exception as e:
+        return {"dt": dt, "sheet": sheet, "question": question, "answer": "", "latency": 0.0, "error": f"{type(e).__name__}: {e}"}
+    return {"dt": dt, "sheet": sheet, "question": question, "answer": h["result"], "latency": h["latency"]}
+
+def score_answer(item, moderation, selected_checks=None, qa_logger=None, index_version=None):
+    sheet, question, answer, latency = item["sheet"], item["question"], item["answer"], item["latency"]
+    error = item.get("error")
+    checks = {}
+    if error is None:
+        try:
+            checks = response_quality_checks(answer, question, context_docs=None, context=None, latency=latency,
+                                             moderation=moderation, checks=selected_checks)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+    if error is None:
+        status = "Pass" if critical_pass(checks) else "Fail"
+    else:
+        status = "Error"
+        answer = f"ERROR: {error}"
+
+    date_str = item["dt"].strftime("%d-%m-%Y")
+    time_str = item["dt"].strftime("%I:%M:%S %p IST")
+    row = {"Date": date_str, "Time": time_str, "Sheet Name": sheet, "Question": question, "Response": answer, "Status": status,}
+    row.update(checks)
+    if qa_logger is not None:
+        log_response(qa_logger, question, answer, checks, latency, index_version, sheet=sheet, status=status, source="qa_batch")
+    print(f"[{sheet}] {question} | {status} | {latency:.2f}s")
+    return row
+
+def main(input_excel, concurrency=1, selected_checks=None, output_format="xlsx", run_id=None, resume=False):
     qa_folder = "qa/qa_output"
     ensure_folder(qa_folder)
-    now_ist = get_ist_now()
-    timestamp_str = now_ist.strftime("%d_%m_%Y_%I_%M_%p_IST")
-    output_file = f"QA_Results_{timestamp_str}.xlsx"
-    output_path = os.path.join(qa_folder, output_file)
 
-    questions = load_questions_from_excel_all_sheets(input_excel)
-    log_rows = []
+    if resume and run_id is None:
+        run_id = latest_run_id(QA_CHECKPOINT_PATH)
+        if run_id is None:
+            print("No earlier run in the checkpoint; starting a new one.")
+    # Seconds plus a short random suffix, so runs started in the same minute never collide.
+    run_id = run_id or f"{get_ist_now().strftime('%d_%m_%Y_%I_%M_%S_%p_IST')}_{uuid.uuid4().hex[:6]}"
+    checkpoint = RunCheckpoint(QA_CHECKPOINT_PATH, run_id)
+    done = checkpoint.done()
+    if done and not resume:
+        raise SystemExit(f"Run '{run_id}' already has {len(done)} answered questions; pass --resume to continue it.")
+    checkpoint.start(input_excel, selected_checks)
 
-    for sheet, question in questions:
-        dt = get_ist_now()
-        date_str = dt.strftime("%d-%m-%Y")
-        time_str = dt.strftime("%I:%M:%S %p IST")
-        h = health_report(get_bot_response, question)
-        answer, latency = h["result"], h["latency"]
-
-        checks = response_quality_checks(answer, question, context_docs=None, context=None, latency=latency)
-        status = "Pass" if critical_pass(checks) else "Fail"
-
-        row = {"Date": date_str, "Time": time_str, "Sheet Name": sheet, "Question": question, "Response": answer, "Status": status,}
-        row.update(checks)
-        log_rows.append(row)
-        print(f"[{sheet}] {question} | {status} | {latency:.2f}s")
-
-    quality_cols = get_response_quality_columns()
+    questions = load_questions_from_excel_all_sheets(input_excel)
+    # (position, sheet, sheet_row, question) still to answer; position keeps the report in
+    # workbook order, and sheet_row keeps repeated questions in a sheet as separate rows.
+    pending, sheet_rows = [], {}
+    for pos, (sheet, question) in enumerate(questions):
+        sheet_row = sheet_rows[sheet] = sheet_rows.get(sheet, -1) + 1
+        if done.get((sheet, sheet_row)) != question:
+            pending.append((pos, sheet, sheet_row, question))
+    print(f"Run {run_id}: {len(questions) - len(pending)} of {len(questions)} questions already done "
+          f"(resume with --resume --run-id {run_id})")
+
+    if pending:
+        # Build the chain once and share it across all workers.
+        from core.rag_engine import get_rag_chain, get_index_version
+        qa_chain = get_rag_chain()
+        index_version = get_index_version()
+        qa_logger = setup_logger(QA_LOG_FILE, QA_LOG_MAX_BYTES, backup_count=QA_LOG_BACKUP_COUNT)
+        run_moderation = any(check.name == "moderation" for check in select_checks(selected_checks))
+
+        # Questions go through in chunks of one moderation batch. Failures come back as
+        # error rows, so one bad question never discards the rest of its chunk; every row
+        # is committed as soon as it is scored. Only a hard kill of the process loses
+        # work: the answers of the chunk still in flight.
+        chunk_size = max(concurrency, MODERATION_BATCH_SIZE)
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            for start in range(0, len(pending), chunk_size):
+                chunk = pending[start:start + chunk_size]
+                answered = list(pool.map(lambda item: answer_question(qa_chain, item[1], item[3]), chunk))
+                # One moderation request per batch of answers instead of one per answer.
+                if run_moderation:
+                    moderations = moderation_check_batch([item["answer"] for item in answered])
+                else:
+                    moderations = [None] * len(answered)
+                rows = pool.map(lambda item, mod: score_answer(item, mod, selected_checks, qa_logger, index_version), answered, moderations)
+                for (pos, sheet, sheet_row, question), row in zip(chunk, rows):
+                    checkpoint.add(pos, sheet, sheet_row, question, row)
+
+    failed = checkpoint.failed()
+    if failed:
+        print(f"⚠️ {failed} questions failed; rerun with --resume --run-id {run_id} to retry only those.")
+
+    # The report is built from the checkpoint, so resumed runs include earlier rows.
+    quality_cols = get_response_quality_columns(selected_checks)
     columns = ["Date", "Time", "Sheet Name", "Question", "Response"] + quality_cols + ["Status"]
-
-    df = pd.DataFrame(log_rows)
-    final_columns = [col for col in columns if col in df.columns]
-    df = df[final_columns]
-    df.to_excel(output_path, index=False)
-
-    # --- Auto-fit all columns ---
-    import openpyxl
-    wb = openpyxl.load_workbook(output_path)
-    ws = wb.active
-    for col in ws.columns:
-        max_length = 0
-        column = col[0].column_letter
-        for cell in col:
-            try:
-                cell_value = str(cell.value) if cell.value is not None else ""
-                max_length = max(max_length, len(cell_value))
-            except Exception:
-                pass
-        adjusted_width = max_length + 2
-        ws.column_dimensions[column].width = adjusted_width
-    wb.save(output_path)
+    output_path = os.path.join(qa_folder, f"QA_Results_{run_id}.{output_format}")
+    writer = open_result_writer(output_path, columns, output_format)
+    for row in checkpoint.rows():
+        writer.append(row)
+    writer.close()
+    checkpoint.close()
 
     print(f"\n✅ QA results saved to: {output_path}")
 
 
 if __name__ == "__main__":
     DEFAULT_EXCEL = "qa/qa_input/qa_test_questions.xlsx"
-    if len(sys.argv) < 2:
+    parser = argparse.ArgumentParser(description="Run the QA question sheet through the Medrisk RAG chain.")
+    parser.add_argument("input_excel", nargs="?", default=None, help=f"Question workbook (default: {DEFAULT_EXCEL})")
+    parser.add_argument("--concurrency", type=int, default=4, help="Number of questions in flight at once (default: 4)")
+    parser.add_argument("--checks", default="all",
+                        help="Quality checks to run: 'all', 'local' (no API calls), 'remote', or comma-separated check names")
+    parser.add_argument("--format", choices=RESULT_FORMATS, default="xlsx",
+                        help="Result file format; csv and parquet suit very large runs (default: xlsx)")
+    parser.add_argument("--run-id", default=None, help="Name of this run in the checkpoint (default: start timestamp)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip questions already answered in --run-id (default: the latest run) and finish it")
+    args = parser.parse_args()
+    selected_checks = args.checks if args.checks in ("all", "local", "remote") else [c.strip() for c in args.checks.split(",") if c.strip()]
+    if args.input_excel is None:
         print(f"No Excel file argument passed, using default: {DEFAULT_EXCEL}")
         input_excel = DEFAULT_EXCEL
     else:
-        input_excel = sys.argv[1]
-    main(input_excel)
+        input_excel = args.input_excel
+    main(input_excel, concurrency=args.concurrency, selected_checks=selected_checks, output_format=args.format,
+         run_id=args.run_id, resume=args.resume)
@@ -1,11 +1,38 @@
 import re
+import json
 import openai
 import os
 import numpy as np
+from collections import namedtuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+from config.env import FAISS_DB_PATH, MODERATION_CACHE_PATH, MODERATION_CACHE_TTL_SECONDS, MODERATION_CACHE_MAX_ENTRIES
+from core.tfidf_index import CorpusTfidf
+from utils.ttl_cache import TTLCache, normalized_text_key
+from utils.tracing import span
 
 client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+JUDGE_MODEL = "gpt-3.5-turbo"
+MODERATION_BATCH_SIZE = 32
+
+# Shared pool for the remote (network-bound) checks of each answer.
+_remote_pool = ThreadPoolExecutor(max_workers=8)
+
+# Moderation verdicts keyed by normalized-text hash; set MODERATION_CACHE_PATH to persist them.
+moderation_cache = TTLCache("moderation", MODERATION_CACHE_MAX_ENTRIES, MODERATION_CACHE_TTL_SECONDS, MODERATION_CACHE_PATH)
+
+_corpus_tfidf = {"loaded": False, "model": None}
+_corpus_tfidf_lock = threading.Lock()
+
+def get_corpus_tfidf():
+    # TF-IDF model persisted with the FAISS index; None falls back to per-answer fitting.
+    with _corpus_tfidf_lock:
+        if not _corpus_tfidf["loaded"]:
+            _corpus_tfidf["model"] = CorpusTfidf.load(FAISS_DB_PATH)
+            _corpus_tfidf["loaded"] = True
+        return _corpus_tfidf["model"]
 
 def is_answer_nonempty(answer, min_length=10):
     length = len(answer.strip()) if answer else 0
@@ -15,17 +42,50 @@ def min_length_check(answer, min_length=100):
     length = len(answer.strip()) if answer else 0
     return f"{length} chars" if length >= min_length else f"Less Than Min. Lenght - 120 chars : {length} chars"
 
+def _moderation_result(result):
+    categories = result.categories
+    cat_dict = categories.model_dump() if hasattr(categories, "model_dump") else dict(categories)
+    cats_str = ", ".join([k for k, v in cat_dict.items() if v]) or "None"
+    return ("No Moderation Flagged (PASS)" if not result.flagged else "Moderation Flagged", cats_str)
+
 def moderation_check(answer):
+    key = normalized_text_key(answer)
+    cached = moderation_cache.get(key)
+    if cached is not None:
+        return tuple(cached)
     try:
-        result = client.moderations.create(input=answer)
-        categories = result.results[0].categories
-        flagged = result.results[0].flagged
-        cat_dict = categories.model_dump() if hasattr(categories, "model_dump") else dict(categories)
-        cats_str = ", ".join([k for k, v in cat_dict.items() if v]) or "None"
-        return ("No Moderation Flagged (PASS)" if not flagged else "Moderation Flagged", cats_str)
+        with span("moderation"):
+            result = client.moderations.create(input=answer)
+        verdict = _moderation_result(result.results[0])
     except Exception as e:
         print(f"Moderation API error: {e}")
         return ("No Moderation Flagged (PASS)", "Error")
+    moderation_cache.set(key, list(verdict))
+    return verdict
+
+def moderation_check_batch(answers, batch_size=MODERATION_BATCH_SIZE):
+    # The moderation endpoint accepts a list of inputs: one round trip per batch,
+    # and only for answers not already in the moderation cache.
+    keys = [normalized_text_key(answer) for answer in answers]
+    verdicts = {}
+    for key in dict.fromkeys(keys):
+        cached = moderation_cache.get(key)
+        if cached is not None:
+            verdicts[key] = tuple(cached)
+    pending = list({key: answer or "" for key, answer in zip(keys, answers) if key not in verdicts}.items())
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        try:
+            with span("moderation", batch=len(batch)):
+                response = client.moderations.create(input=[answer for _, answer in batch])
+            for (key, _), r in zip(batch, response.results):
+                verdicts[key] = _moderation_result(r)
+                moderation_cache.set(key, list(verdicts[key]))
+        except Exception as e:
+            print(f"Moderation API error: {e}")
+            for key, _ in batch:
+                verdicts[key] = ("No Moderation Flagged (PASS)", "Error")
+    return [verdicts[key] for key in keys]
 
 def is_not_hallucination(answer, allowed_phrases=None):
     if allowed_phrases is None:
@@ -36,10 +96,14 @@ def is_not_hallucination(answer, allowed_phrases=None):
 def no_hallucination_semantic(answer, context_docs, threshold=0.55):
     if not context_docs:
         return "No docs", "1.00/1.00 (PASS)"
-    docs_text = " ".join(context_docs)
-    vectorizer = TfidfVectorizer().fit([answer, docs_text])
-    vectors = vectorizer.transform([answer, docs_text])
-    score = cosine_similarity(vectors[0], vectors[1])[0, 0]
+    model = get_corpus_tfidf()
+    if model is not None:
+        score = model.centroid_similarity([answer], [context_docs])[0]
+    else:
+        docs_text = " ".join(context_docs)
+        vectorizer = TfidfVectorizer().fit([answer, docs_text])
+        vectors = vectorizer.transform([answer, docs_text])
+        score = cosine_similarity(vectors[0], vectors[1])[0, 0]
     status = "Semantic Search (PASS)" if score >= threshold else "Semantic Search (LOW)"
     return status, f"{score:.2f}/1.00 ({status})"
 
@@ -72,60 +136,63 @@ def no_repetition(answer, n=3):
     ngrams = [" ".join(words[i:i+n]) for i in range(len(words)-n+1)]
     return "No Phrase Repeatation (PASS)" if len(ngrams) == len(set(ngrams)) else "Repeated phrase"
 
-def completeness_check(answer, question, context_docs):
-    prompt = f"""
-You are an expert judge. Given the question and answer below, reply 'Complete' if the answer covers all major points of the question, otherwise reply 'Incomplete'.
-
-Question: {question}
-Answer: {answer}
-"""
-    try:
-        response = client.chat.completions.create(model="gpt-3.5-turbo", messages=[{"role": "user", "content": prompt}])
-        content = response.choices[0].message.content.strip()
-        return content
-    except Exception as e:
-        print(f"Completeness check error: {e}")
-        return "LLM_CHECK_ERROR"
-
-def is_polite_formal(answer):
-    prompt = f"""
-Is the following answer polite and formal? Reply only 'Polite' or 'Impolite'.
-
-Answer: {answer}
-"""
-    try:
-        response = client.chat.completions.create(model="gpt-3.5-turbo", messages=[{"role": "user", "content": prompt}])
-        content = response.choices[0].message.content.strip()
-        return content
-    except Exception as e:
-        print(f"Politeness check error: {e}")
-        return "LLM_CHECK_ERROR"
-
-def is_correct(answer, question, context_docs):
-    context = "\n\n".join(context_docs or [])
+def llm_judge(answer, question=None, context=None):
+    # Politeness, completeness and correctness from a single JSON-mode call.
+    # Completeness and correctness are only judged when context is given.
+    fields = {"politeness": "'Polite' or 'Impolite': is the answer polite and formal?"}
+    if context:
+        fields["completeness"] = "'Complete' or 'Incomplete': does the answer cover all major points of the question?"
+        fields["correctness"] = "'Correct' or 'Incorrect': is the answer factually correct based on the given context?"
+        context_text = context if isinstance(context, str) else "\n\n".join(context)
+    spec = "\n".join(f'- "{key}": {desc}' for key, desc in fields.items())
     prompt = f"""
-Is the following answer factually correct based on the given context? Reply only 'Correct' or 'Incorrect'.
-
-Context: {context}
-Question: {question}
-Answer: {answer}
+You are an expert judge. Evaluate the answer below and reply with a JSON object containing exactly these keys:
+{spec}
 """
+    if context:
+        prompt += f"\nContext: {context_text}"
+    prompt += f"\nQuestion: {question}\nAnswer: {answer}\n"
+    empty = {"Politeness": "", "Completeness": "", "Correctness": ""}
     try:
-        response = client.chat.completions.create(model="gpt-3.5-turbo", messages=[{"role": "user", "content": prompt}])
-        content = response.choices[0].message.content.strip()
-        return content
+        response = client.chat.completions.create(
+            model=JUDGE_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            response_format={"type": "json_object"},
+            temperature=0,
+        )
+        verdict = json.loads(response.choices[0].message.content)
+        result = dict(empty)
+        for key in fields:
+            result[key.capitalize()] = str(verdict.get(key, "LLM_CHECK_ERROR")).strip()
+        return result
     except Exception as e:
-        print(f"Correctness check error: {e}")
-        return "LLM_CHECK_ERROR"
+        print(f"LLM judge error: {e}")
+        result = dict(empty)
+        for key in fields:
+            result[key.capitalize()] = "LLM_CHECK_ERROR"
+        return result
 
 def coverage_check(answer, context_docs, threshold=0.4):
     if not context_docs:
         return "No docs"
-    vectorizer = TfidfVectorizer().fit([answer] + context_docs)
-    answer_vec = vectorizer.transform([answer])
-    docs_vec = vectorizer.transform(context_docs)
-    sims = cosine_similarity(answer_vec, docs_vec)[0]
-    best = np.max(sims)
+    model = get_corpus_tfidf()
+    if model is not None:
+        best = model.best_similarity([answer], [context_docs])[0]
+    else:
+        vectorizer = TfidfVectorizer().fit([answer] + context_docs)
+        answer_vec = vectorizer.transform([answer])
+        docs_vec = vectorizer.transform(context_docs)
+        sims = cosine_similarity(answer_vec, docs_vec)[0]
+        best = np.max(sims)
+    return f"{best:.2f}/1.00 ({'PASS' if best > threshold else 'LOW'})"
+
+def corpus_coverage_check(answer, threshold=0.4):
+    # Best match against every knowledge-base chunk, using the precomputed chunk
+    # vectors; unlike coverage_check it needs no retrieved context (batch QA runs).
+    model = get_corpus_tfidf()
+    if model is None:
+        return "No TF-IDF model"
+    best = model.best_similarity([answer])[0]
     return f"{best:.2f}/1.00 ({'PASS' if best > threshold else 'LOW'})"
 
 def no_forbidden_phrases(answer, forbidden_phrases=None):
@@ -172,40 +239,80 @@ def valid_json_xml(answer):
 def not_exact_copy(answer, context_docs):
     return "No Exact Copy Found (PASS)" if not any(answer.strip() == doc.strip() for doc in context_docs or []) else "Verbatim Copy"
 
+# --- Check registry ---
+# Each check declares its cost class, the inputs it reads and the report
+# columns it fills; `run(inputs)` returns one value per column.
+
+LOCAL = "local"
+REMOTE = "remote"
+
+QualityCheck = namedtuple("QualityCheck", ["name", "cost", "inputs", "columns", "run"])
+
+def _judge(inputs):
+    verdict = llm_judge(inputs["answer"], inputs["question"], inputs["context"])
+    return verdict["Completeness"], verdict["Politeness"], verdict["Correctness"]
+
+QUALITY_CHECKS = [
+    QualityCheck("valid_json_xml", LOCAL, ("answer",), ("Valid JSON/XML",), lambda i: (valid_json_xml(i["answer"]),)),
+    QualityCheck("non_empty", LOCAL, ("answer",), ("Non-empty",), lambda i: (is_answer_nonempty(i["answer"]),)),
+    QualityCheck("min_length", LOCAL, ("answer",), ("Min Length",), lambda i: (min_length_check(i["answer"]),)),
+
+    QualityCheck("moderation", REMOTE, ("answer", "moderation"), ("Moderation", "Moderation Categories"),
+                 lambda i: i["moderation"] or moderation_check(i["answer"])),
+    QualityCheck("pii", LOCAL, ("answer",), ("PII Check",), lambda i: (contains_no_pii(i["answer"]),)),
+
+    QualityCheck("forbidden_phrase", LOCAL, ("answer",), ("Forbidden Phrase",), lambda i: (no_forbidden_phrases(i["answer"]),)),
+    QualityCheck("sensitive_advice", LOCAL, ("answer",), ("Sensitive Advice",), lambda i: (no_sensitive_advice(i["answer"]),)),
+    QualityCheck("refusal", LOCAL, ("answer",), ("Refusal",), lambda i: (no_refusal(i["answer"]),)),
+
+    QualityCheck("coverage", LOCAL, ("answer", "context_docs"), ("Coverage",), lambda i: (coverage_check(i["answer"], i["context_docs"]),)),
+    QualityCheck("corpus_coverage", LOCAL, ("answer",), ("Corpus Coverage",), lambda i: (corpus_coverage_check(i["answer"]),)),
+    QualityCheck("llm_judge", REMOTE, ("answer", "question", "context"), ("Completeness", "Politeness", "Correctness"), _judge),
+
+    QualityCheck("keyword_hallucination", LOCAL, ("answer",), ("Keyword Hallucination",), lambda i: (is_not_hallucination(i["answer"]),)),
+    QualityCheck("semantic_hallucination", LOCAL, ("answer", "context_docs"), ("Semantic No Hallucination",),
+                 lambda i: (no_hallucination_semantic(i["answer"], i["context_docs"])[1],)),
+    QualityCheck("relevance", LOCAL, ("answer", "question"), ("Relevance",),
+                 lambda i: (is_relevant(i["answer"], i["question"]) if i["question"] else "",)),
+    QualityCheck("exact_copy", LOCAL, ("answer", "context_docs"), ("Exact Copy",), lambda i: (not_exact_copy(i["answer"], i["context_docs"]),)),
+    QualityCheck("phrase_repetition", LOCAL, ("answer",), ("Phrase Repetition",), lambda i: (no_repetition(i["answer"]),)),
+
+    QualityCheck("citations", LOCAL, ("answer",), ("Citations",), lambda i: (citations_present(i["answer"]),)),
+    QualityCheck("latency", LOCAL, ("latency",), ("Latency",), lambda i: (response_time_check(i["latency"]),)),
+]
+
+def select_checks(checks=None):
+    # None/"all" -> every check; "local"/"remote" -> by cost; otherwise an iterable of check names.
+    if checks is None or checks == "all":
+        return list(QUALITY_CHECKS)
+    if checks in (LOCAL, REMOTE):
+        return [c for c in QUALITY_CHECKS if c.cost == checks]
+    names = set(checks)
+    unknown = names - {c.name for c in QUALITY_CHECKS}
+    if unknown:
+        raise ValueError(f"Unknown quality check(s): {', '.join(sorted(unknown))}")
+    return [c for c in QUALITY_CHECKS if c.name in names]
+
 # --- Main QA check aggregator ---
 
-def response_quality_checks(answer, question=None, context_docs=None, context=None, latency=0.0):
-    is_safe, mod_categories = moderation_check(answer)
-    halluc, halluc_score = no_hallucination_semantic(answer, context_docs or [])
-    return {
-        "Valid JSON/XML": valid_json_xml(answer),
-        "Non-empty": is_answer_nonempty(answer),
-        "Min Length": min_length_check(answer),
-        
-        "Moderation": is_safe,
-        "Moderation Categories": mod_categories,
-        "PII Check": contains_no_pii(answer),
-                
-        "Forbidden Phrase": no_forbidden_phrases(answer),
-        "Sensitive Advice": no_sensitive_advice(answer),
-        "Refusal": no_refusal(answer),
-        
-        "Coverage": coverage_check(answer, context_docs or []),
-        "Completeness": completeness_check(answer, question, context) if context else "",
-        "Politeness": is_polite_formal(answer),
-        "Correctness": is_correct(answer, question, context) if context else "",
-                
-        "Keyword Hallucination": is_not_hallucination(answer),
-        "Semantic No Hallucination": halluc_score,
-        "Relevance": is_relevant(answer, question) if question else "",
-        "Exact Copy": not_exact_copy(answer, context_docs or []),
-        "Phrase Repetition": no_repetition(answer),
-        
-        "Citations": citations_present(answer),
-        "Latency": response_time_check(latency),
+def response_quality_checks(answer, question=None, context_docs=None, context=None, latency=0.0, moderation=None, checks=None):
+    # Remote checks run concurrently; pass `moderation` when it was batched upfront.
+    inputs = {
+        "answer": answer,
+        "question": question,
+        "context_docs": context_docs or [],
+        "context": context,
+        "latency": latency,
+        "moderation": moderation,
     }
+    selected = select_checks(checks)
+    futures = {c.name: _remote_pool.submit(c.run, inputs) for c in selected if c.cost == REMOTE}
+    results = {}
+    for check in selected:
+        values = futures[check.name].result() if check.name in futures else check.run(inputs)
+        results.update(zip(check.columns, values))
+    return results
 
-def get_response_quality_columns():
-    # Return the keys of the dict as produced by response_quality_checks
-    dummy = response_quality_checks("dummy", "dummy")
-    return list(dummy.keys())
+def get_response_quality_columns(checks=None):
+    # Column order comes from the registry, so no check has to run.
+    return [col for check in select_checks(checks) for col in check.columns]
@@ -0,0 +1,112 @@
+import csv
+import json
+import os
+import tempfile
+
+RESULT_FORMATS = ("xlsx", "csv", "parquet")
+# Excel rejects wider columns.
+MAX_COLUMN_WIDTH = 255
+PARQUET_ROW_GROUP_SIZE = 1000
+
+
+def _cell_text(value):
+    return "" if value is None else str(value)
+
+
+class ExcelResultWriter:
+    """Writes rows to .xlsx with openpyxl's write-only (streaming) workbook.
+
+    Write-only sheets need column widths before the first row, so appended
+    rows go to a JSON-lines spool file while widths are tracked; close()
+    then streams the spool into the workbook and saves it once.
+    """
+
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = columns
+        self.widths = [len(col) for col in columns]
+        self.rows = 0
+        self._spool = tempfile.TemporaryFile("w+", encoding="utf-8")
+
+    def append(self, row):
+        values = [row.get(col) for col in self.columns]
+        for i, value in enumerate(values):
+            self.widths[i] = max(self.widths[i], len(_cell_text(value)))
+        self._spool.write(json.dumps(values, default=str) + "\n")
+        self.rows += 1
+
+    def close(self):
+        from openpyxl import Workbook
+        from openpyxl.utils import get_column_letter
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet()
+        for i, width in enumerate(self.widths, start=1):
+            ws.column_dimensions[get_column_letter(i)].width = min(width + 2, MAX_COLUMN_WIDTH)
+        ws.append(self.columns)
+        self._spool.seek(0)
+        for line in self._spool:
+            ws.append(json.loads(line))
+        self._spool.close()
+        wb.save(self.path)
+
+
+class CsvResultWriter:
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = columns
+        self.rows = 0
+        # utf-8-sig so Excel opens non-ASCII answers correctly
+        self._file = open(path, "w", newline="", encoding="utf-8-sig")
+        self._writer = csv.DictWriter(self._file, fieldnames=columns, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def append(self, row):
+        self._writer.writerow(row)
+        self.rows += 1
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetResultWriter:
+    """Writes rows to Parquet in row groups of PARQUET_ROW_GROUP_SIZE; every column is a string."""
+
+    def __init__(self, path, columns):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self.path = path
+        self.columns = columns
+        self.rows = 0
+        self._schema = pa.schema([(col, pa.string()) for col in columns])
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self._pending = []
+
+    def append(self, row):
+        self._pending.append(row)
+        self.rows += 1
+        if len(self._pending) >= PARQUET_ROW_GROUP_SIZE:
+            self._flush()
+
+    def _flush(self):
+        if self._pending:
+            data = {col: [None if r.get(col) is None else str(r.get(col)) for r in self._pending] for col in self.columns}
+            self._writer.write_table(self._pa.Table.from_pydict(data, schema=self._schema))
+            self._pending = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+WRITERS = {"xlsx": ExcelResultWriter, "csv": CsvResultWriter, "parquet": ParquetResultWriter}
+
+
+def open_result_writer(path, columns, fmt=None):
+    """Returns a writer with append(row_dict) and close(); the format defaults to the path's extension."""
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown result format '{fmt}'; expected one of {', '.join(RESULT_FORMATS)}")
+    return WRITERS[fmt](path, columns)
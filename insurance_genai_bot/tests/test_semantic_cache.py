@@ -0,0 +1,40 @@
+import pytest
+
+from core.response_cache import query_terms
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ("Is maternity covered?", "Is maternity not covered?"),
+        ("Is cataract surgery covered under plan A?", "Is cataract surgery covered under plan B?"),
+        ("Are implants covered with co-payment?", "Are implants covered without co-payment?"),
+        ("What is the room rent limit for policy 1?", "What is the room rent limit for policy 2?"),
+    ],
+)
+def test_near_miss_questions_have_different_terms(first, second):
+    assert query_terms(first) != query_terms(second)
+
+
+def test_rephrasing_keeps_terms():
+    assert query_terms("What is the room rent limit?") == query_terms("room rent limit - what is it")
+
+
+@pytest.mark.parametrize(
+    "cached, asked",
+    [
+        ("Is maternity covered?", "Is maternity not covered?"),
+        ("Is cataract surgery covered under plan A?", "Is cataract surgery covered under plan B?"),
+    ],
+)
+def test_near_miss_questions_do_not_hit(cached, asked):
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("faiss")
+    from core.semantic_cache import SemanticCache
+
+    cache = SemanticCache(threshold=0.95)
+    vector = np.ones(8, dtype="float32")
+    cache.add(cached, vector, "stored answer", "v1")
+    # Identical vectors: similarity alone would serve the stored answer.
+    assert cache.lookup(asked, vector, "v1") is None
+    assert cache.lookup(cached, vector, "v1") == "stored answer"
@@ -1,40 +1,63 @@
+import math
+
 import streamlit as st
+from config.env import CHAT_HISTORY_WINDOW, CHAT_HISTORY_PAGE_SIZE
+from utils.tracing import span
+
+# Custom CSS for bubbles
+BUBBLE_CSS = """
+<style>
+.chat-bubble-user {
+    background: #f0f5ff;
+    border-radius: 20px;
+    padding: 12px;
+    margin-bottom: 8px;
+    max-width: 60%;
+    align-self: flex-end;
+}
+.chat-bubble-bot {
+    background: #e6ffe6;
+    border-radius: 20px;
+    padding: 12px;
+    margin-bottom: 8px;
+    max-width: 60%;
+    align-self: flex-start;
+}
+</style>
+"""
+
+
+def bot_bubble(msg):
+    return f'<div class="chat-bubble-bot"><b>🩺 Medrisk Assistant:</b> {msg}</div>'
+
+
+def chat_bubble(role, msg):
+    if role == "user":
+        return f'<div class="chat-bubble-user"><b>{st.session_state.username}:</b> {msg}</div>'
+    return bot_bubble(msg)
+
+
+def show_older_messages(history, older, page_size=CHAT_HISTORY_PAGE_SIZE):
+    # Only one page is rendered per rerun, however long the conversation gets.
+    with st.expander(f"🕘 Older messages ({older})"):
+        pages = math.ceil(older / page_size)
+        page = 1
+        if pages > 1:
+            page = st.number_input("Page (1 = most recent)", min_value=1, max_value=pages, value=1, key="older_messages_page")
+        stop = history.first_position + older - (page - 1) * page_size
+        st.markdown(
+            "".join(chat_bubble(role, msg) for role, msg in history.page(stop - page_size, stop)),
+            unsafe_allow_html=True,
+        )
 
 
-def show_chat_history(history):
-    # Custom CSS for bubbles
-    st.markdown(
-        """
-        <style>
-        .chat-bubble-user {
-            background: #f0f5ff;
-            border-radius: 20px;
-            padding: 12px;
-            margin-bottom: 8px;
-            max-width: 60%;
-            align-self: flex-end;
-        }
-        .chat-bubble-bot {
-            background: #e6ffe6;
-            border-radius: 20px;
-            padding: 12px;
-            margin-bottom: 8px;
-            max-width: 60%;
-            align-self: flex-start;
-        }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
-    # Render chat bubbles for each message
-    for role, msg in history:
-        if role == "user":
-            st.markdown(
-                f'<div class="chat-bubble-user"><b>{st.session_state.username}:</b> {msg}</div>',
-                unsafe_allow_html=True,
-            )
-        else:
-            st.markdown(
-                f'<div class="chat-bubble-bot"><b>🩺 Medrisk Assistant:</b> {msg}</div>',
-                unsafe_allow_html=True,
-            )
+def show_chat_history(history, window=CHAT_HISTORY_WINDOW):
+    # Render the newest `window` bubbles in one markdown call; older ones sit behind an expander.
+    with span("render"):
+        older = len(history) - window - history.first_position
+        if older > 0:
+            show_older_messages(history, older)
+        st.markdown(
+            BUBBLE_CSS + "".join(chat_bubble(role, msg) for role, msg in history.window(window)),
+            unsafe_allow_html=True,
+        )
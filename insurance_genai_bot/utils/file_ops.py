@@ -1,5 +1,9 @@
+import hashlib
 import os
 
+# path -> (mtime_ns, size, sha256); content is re-hashed only when stat changes
+_hash_memo = {}
+
 
 def list_data_files(data_folder):
     pdfs, excels = [], []
@@ -10,3 +14,45 @@ def list_data_files(data_folder):
         elif fname.lower().endswith((".xls", ".xlsx")):
             excels.append(fpath)
     return pdfs, excels
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cached_file_sha256(path):
+    stat = os.stat(path)
+    memo = _hash_memo.get(path)
+    if memo and memo[0] == stat.st_mtime_ns and memo[1] == stat.st_size:
+        return memo[2]
+    sha = file_sha256(path)
+    _hash_memo[path] = (stat.st_mtime_ns, stat.st_size, sha)
+    return sha
+
+
+def _iter_files(root):
+    if os.path.isfile(root):
+        yield root
+        return
+    for dirpath, _, fnames in os.walk(root):
+        for fname in fnames:
+            yield os.path.join(dirpath, fname)
+
+
+def fingerprint_paths(*paths):
+    # Digest over (path, mtime, size, content hash) of every file under `paths`.
+    # Missing paths are recorded too, so creating them changes the fingerprint.
+    digest = hashlib.sha256()
+    for root in paths:
+        if not os.path.exists(root):
+            digest.update(f"missing|{root}\n".encode())
+            continue
+        for fpath in sorted(_iter_files(root)):
+            stat = os.stat(fpath)
+            sha = cached_file_sha256(fpath)
+            digest.update(f"{fpath}|{stat.st_mtime_ns}|{stat.st_size}|{sha}\n".encode())
+    return digest.hexdigest()
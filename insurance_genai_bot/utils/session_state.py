@@ -1,6 +1,10 @@
 import streamlit as st
+from config.env import CHAT_TRANSCRIPT_MAX_IN_MEMORY, CHAT_TRANSCRIPT_SPILL_PATH
+from utils.transcript import BoundedTranscript
 
 
 def init_session_state():
     if "chat_history" not in st.session_state:
-        st.session_state.chat_history = []
+        st.session_state.chat_history = BoundedTranscript(
+            CHAT_TRANSCRIPT_MAX_IN_MEMORY, CHAT_TRANSCRIPT_SPILL_PATH
+        )
@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from itertools import islice
+
+# Spilled messages older than this are deleted the next time a session opens the file.
+SPILL_RETENTION_SECONDS = 7 * 24 * 3600
+
+
+class BoundedTranscript:
+    """Chat transcript of (role, message) pairs with bounded memory.
+
+    The newest `max_in_memory` messages stay in a deque. Older ones are
+    dropped, unless `spill_path` is given: then they are written to a SQLite
+    file keyed by session id and kept for SPILL_RETENTION_SECONDS (7 days).
+    Positions are absolute, so `window` and `page` work the same on both tiers.
+    """
+
+    def __init__(self, max_in_memory=200, spill_path=None, session_id=None):
+        self.max_in_memory = max(1, int(max_in_memory))
+        self.spill_path = spill_path
+        self.session_id = session_id or uuid.uuid4().hex
+        self._recent = deque()
+        self._spilled = 0
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        if self._conn is None:
+            folder = os.path.dirname(self.spill_path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self._conn = sqlite3.connect(self.spill_path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS transcript ("
+                " session_id TEXT NOT NULL, position INTEGER NOT NULL, role TEXT NOT NULL,"
+                " message TEXT NOT NULL, created_at REAL NOT NULL, PRIMARY KEY (session_id, position))"
+            )
+            # Abandoned sessions never clear themselves; age their rows out instead.
+            self._conn.execute(
+                "DELETE FROM transcript WHERE created_at < ?", (time.time() - SPILL_RETENTION_SECONDS,)
+            )
+            self._conn.commit()
+        return self._conn
+
+    def append(self, message):
+        role, text = message
+        with self._lock:
+            self._recent.append((role, text))
+            if len(self._recent) > self.max_in_memory:
+                oldest = self._recent.popleft()
+                if self.spill_path:
+                    conn = self._connection()
+                    conn.execute(
+                        "INSERT OR REPLACE INTO transcript VALUES (?, ?, ?, ?, ?)",
+                        (self.session_id, self._spilled, oldest[0], oldest[1], time.time()),
+                    )
+                    conn.commit()
+                self._spilled += 1
+
+    def __len__(self):
+        return self._spilled + len(self._recent)
+
+    @property
+    def first_position(self):
+        """Position of the oldest message that can still be read."""
+        return 0 if self.spill_path else self._spilled
+
+    def window(self, count):
+        """The newest `count` messages, oldest first."""
+        with self._lock:
+            newest = list(islice(reversed(self._recent), count))
+        newest.reverse()
+        return newest
+
+    def page(self, start, stop):
+        """Messages at absolute positions [start, stop), reading spilled ones from SQLite."""
+        start, stop = max(0, start), min(stop, len(self))
+        messages = []
+        with self._lock:
+            if start < self._spilled and self.spill_path:
+                rows = self._connection().execute(
+                    "SELECT role, message FROM transcript WHERE session_id = ?"
+                    " AND position >= ? AND position < ? ORDER BY position",
+                    (self.session_id, start, min(stop, self._spilled)),
+                ).fetchall()
+                messages.extend(rows)
+            first = max(start, self._spilled) - self._spilled
+            last = stop - self._spilled
+            if last > first:
+                messages.extend(islice(self._recent, first, last))
+        return messages
+
+    def __iter__(self):
+        return iter(self.page(0, len(self)))
+
+    def clear(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM transcript WHERE session_id = ?", (self.session_id,))
+                self._conn.commit()
+            self._recent.clear()
+            self._spilled = 0
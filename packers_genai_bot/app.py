@@ -14,7 +14,7 @@ from langchain.chains import RetrievalQA
 
 # ---------------------- Internal Modules ----------------------
 # Config
-from config.env import OPENAI_API_KEY, MYSQL_CONFIG, FAISS_DB_PATH
+from config.env import OPENAI_API_KEY, MYSQL_CONFIG, FAISS_DB_PATH, TRACE_JSONL_PATH, METRICS_PORT
 
 # Core Logic
 from core.safety_check import is_safe_input
@@ -36,10 +36,14 @@ from ui.chat_display import render_chat_history
 # Utilities
 from utils.helpers import strip_unicode
 from utils.session_state import init_session_state
+from utils.tracing import configure_tracing
 
 
 # ---------------------- App Initialization ----------------------
 def main():
+    # 0️⃣ Per-stage latency spans: optional JSONL sink and local /metrics endpoint (once per process)
+    configure_tracing(TRACE_JSONL_PATH, METRICS_PORT, prefix="packers")
+
     # 1️⃣ Setup UI theme (CSS, layout)
     setup_ui()
 
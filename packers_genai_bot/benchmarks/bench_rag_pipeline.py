@@ -0,0 +1,167 @@
+# ---------------------- RAG Pipeline Benchmark ----------------------
+"""Offline benchmark of the Packers RAG request path across corpus sizes.
+
+The index is built from a synthetic corpus with HashingEmbeddings, and
+rag.chain is wired to the same embeddings and FixedLatencyChatModel, so runs
+need no network and are repeatable. Reports index build and load time,
+on-disk size, RSS, retrieval p50/p99 and chain overhead (wall time minus the
+fake model's latency):
+
+    python -m benchmarks.bench_rag_pipeline --chunks 1000,10000,100000,500000 --output bench_rag.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.fake_embeddings import HashingEmbeddings
+from benchmarks.fake_llm import FixedLatencyChatModel
+from config.env import FAISS_INDEX_TYPE, FAISS_RERANK
+from rag import chain
+from rag.vector_store import build_vectorstore, process_memory_mb, save_vectorstore
+
+VOCABULARY = (
+    "packing moving shifting household goods bike car carrier truck tempo loading unloading "
+    "carton bubble-wrap wooden crate insurance transit damage claim floor lift stairs labour "
+    "estimate quotation advance payment refund cancellation reschedule pickup delivery warehouse "
+    "storage fragile furniture dismantling assembly intercity local office relocation tracking"
+).split()
+
+
+def chunk_text(rng, words=80):
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+def percentiles_ms(samples):
+    samples = np.asarray(samples) * 1000
+    return {"p50": float(np.percentile(samples, 50)), "p99": float(np.percentile(samples, 99))}
+
+
+def folder_mb(folder):
+    total = sum(
+        os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(folder) for name in names
+    )
+    return total / 2 ** 20
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_index(db_path, n_chunks, embeddings, seed):
+    rng = random.Random(seed + n_chunks)
+    texts = [chunk_text(rng) for _ in range(n_chunks)]
+    store = build_vectorstore(
+        list(zip(texts, embeddings.embed_documents(texts))),
+        embeddings,
+        metadatas=[{"source": f"sheet_{i % 12}"} for i in range(n_chunks)],
+        index_type=FAISS_INDEX_TYPE,
+        rerank=FAISS_RERANK,
+    )
+    save_vectorstore(store, db_path)
+
+
+def run_size(n_chunks, args, llm, work_dir):
+    db_path = os.path.join(work_dir, f"packers_faiss_{n_chunks}")
+    embeddings = HashingEmbeddings(args.dim)
+    chain.make_embeddings = lambda: embeddings
+    chain.make_llm = lambda: llm
+
+    memory_before = process_memory_mb()
+    start = time.perf_counter()
+    build_index(db_path, n_chunks, embeddings, args.seed)
+    build_seconds = time.perf_counter() - start
+
+    # What each Streamlit session pays when it first loads the chain.
+    start = time.perf_counter()
+    qa_chain = chain.get_rag_chain(db_path)
+    load_seconds = time.perf_counter() - start
+    memory_after = process_memory_mb()
+
+    rng = random.Random(args.seed * 31 + n_chunks)
+    queries = [" ".join(rng.sample(VOCABULARY, 6)) + f" q{i}" for i in range(args.queries)]
+    retrieval = []
+    for query in queries:
+        start = time.perf_counter()
+        qa_chain.retriever.invoke(query)
+        retrieval.append(time.perf_counter() - start)
+
+    overhead, first_token = [], []
+    for query in queries[: args.chain_queries]:
+        start = time.perf_counter()
+        qa_chain.invoke(query + " chain")
+        overhead.append(time.perf_counter() - start - llm.latency)
+        start = time.perf_counter()
+        next(iter(chain.stream_answer(qa_chain, query + " stream")))
+        first_token.append(time.perf_counter() - start - llm.first_token_latency)
+
+    result = {
+        "chunks": n_chunks,
+        "build_seconds": build_seconds,
+        "load_seconds": load_seconds,
+        "index_mb_on_disk": folder_mb(db_path),
+        "memory_mb": memory_after,
+        "memory_growth_mb": {k: v - memory_before.get(k, 0.0) for k, v in memory_after.items()},
+        "retrieval_ms": percentiles_ms(retrieval),
+        "chain_overhead_ms": percentiles_ms(overhead),
+        "first_token_overhead_ms": percentiles_ms(first_token),
+    }
+    shutil.rmtree(db_path, ignore_errors=True)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", default="1000,10000,100000", help="Comma-separated corpus sizes")
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--chain-queries", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--first-token-latency", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="bench_rag_pipeline.json")
+    args = parser.parse_args()
+
+    llm = FixedLatencyChatModel(latency=args.llm_latency, first_token_latency=args.first_token_latency)
+    work_dir = tempfile.mkdtemp(prefix="packers_bench_")
+    results = []
+    try:
+        print(f"{'chunks':>8} {'build s':>8} {'load s':>7} {'disk MB':>8} {'ret p50':>8} {'ret p99':>8} {'ovh p50':>8} {'ovh p99':>8}")
+        for n_chunks in [int(v) for v in args.chunks.split(",") if v]:
+            run = run_size(n_chunks, args, llm, work_dir)
+            results.append(run)
+            print(
+                f"{n_chunks:>8} {run['build_seconds']:>8.2f} {run['load_seconds']:>7.2f} {run['index_mb_on_disk']:>8.1f} "
+                f"{run['retrieval_ms']['p50']:>8.2f} {run['retrieval_ms']['p99']:>8.2f} "
+                f"{run['chain_overhead_ms']['p50']:>8.2f} {run['chain_overhead_ms']['p99']:>8.2f}"
+            )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "bot": "packers",
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "index_type": FAISS_INDEX_TYPE,
+        "settings": vars(args),
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+# ---------------------- Load Test ----------------------
+"""Headless multi-session load test of the Packers chat path.
+
+Each simulated session is a thread that, like process_user_query, runs
+moderation and then message_handler.respond_to_query() (MySQL logging,
+estimation routing, answer cache, retrieval and the streamed LLM answer),
+then waits a sampled think time before its next question. OpenAI moderation, embeddings
+and chat, and MySQL are replaced by fixed-latency local stand-ins over a
+synthetic index:
+
+    python -m benchmarks.load_test --sessions 1,5,10,25,50 --duration 60 --think-time exp:3
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+import pandas as pd
+
+from benchmarks.bench_rag_pipeline import build_index, git_commit
+from benchmarks.fake_embeddings import HashingEmbeddings
+from benchmarks.fake_llm import FixedLatencyChatModel
+from config.env import MODERATION_CACHE_MAX_ENTRIES, MODERATION_CACHE_TTL_SECONDS, RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS
+from core import message_handler, safety_check
+from core.response_cache import ResponseCache
+from rag import chain
+from utils.tracing import percentile, span, tracer
+from utils.ttl_cache import TTLCache
+
+DEFAULT_QUESTIONS = [
+    "How do you pack fragile items like glassware?",
+    "Is transit insurance included in the moving charges?",
+    "Can you move my bike along with household goods?",
+    "What happens if my furniture is damaged during transit?",
+    "Do you provide storage or warehouse facilities?",
+    "How many days does an intercity relocation take?",
+    "Can I reschedule my pickup date?",
+    "What is your cancellation and refund policy?",
+    "Do you dismantle and reassemble beds and wardrobes?",
+    "How much advance payment is required?",
+    "Can I track my shipment during the move?",
+    "Do you handle office relocation on weekends?",
+    "What is the estimate for a 2BHK move to Pune?",
+    "Please calculate the cost for shifting a car to Delhi.",
+]
+
+
+def load_questions(path):
+    """Questions from a .txt file (one per line) or a workbook's 'question' columns; built-in list if no path."""
+    if not path:
+        return DEFAULT_QUESTIONS
+    if path.endswith((".xlsx", ".xls")):
+        questions = []
+        for df in pd.read_excel(path, sheet_name=None).values():
+            columns = [c for c in df.columns if str(c).replace(" ", "").lower() == "question"]
+            if columns:
+                questions.extend(str(q) for q in df[columns[0]].dropna())
+        return questions
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def think_time_sampler(spec):
+    """Parses 'fixed:S', 'uniform:LOW,HIGH' or 'exp:MEAN' into a function of a Random."""
+    kind, _, value = spec.partition(":")
+    params = [float(v) for v in value.split(",") if v] or [0.0]
+    if kind == "fixed":
+        return lambda rng: params[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(params[0], params[-1])
+    if kind == "exp":
+        return lambda rng: rng.expovariate(1.0 / params[0]) if params[0] > 0 else 0.0
+    raise ValueError(f"Unknown think-time distribution: {spec}")
+
+
+class FakeModerationClient:
+    """Stand-in for openai.OpenAI() moderations: waits `latency` seconds and never flags."""
+
+    def __init__(self, latency=0.1):
+        self.latency = latency
+        self.moderations = self
+
+    def create(self, input):
+        time.sleep(self.latency)
+        return SimpleNamespace(results=[SimpleNamespace(flagged=False)])
+
+
+def fake_mysql_logger(latency):
+    """Stand-in for log_to_mysql: one connect + insert + commit round trip of `latency` seconds."""
+    def log_to_mysql(name, message):
+        with span("mysql_log"):
+            time.sleep(latency)
+    return log_to_mysql
+
+
+def reset_caches(answer_cache):
+    # Every level starts cold, so levels are comparable and hit rates are per level.
+    message_handler.response_cache = ResponseCache(
+        "packers", chain.CHAIN_CONFIG, RESPONSE_CACHE_MAX_ENTRIES if answer_cache else 0, RESPONSE_CACHE_TTL_SECONDS
+    )
+    safety_check.moderation_cache = TTLCache("moderation", MODERATION_CACHE_MAX_ENTRIES, MODERATION_CACHE_TTL_SECONDS)
+
+
+def run_session(session_id, load_chain, questions, think_time, deadline, args, results, lock):
+    rng = random.Random(args.seed * 1000 + session_id)
+    # Sessions start at different points of the question list, as real users would.
+    position = rng.randrange(len(questions))
+    while True:
+        time.sleep(min(think_time(rng), max(0.0, deadline - time.perf_counter())))
+        if time.perf_counter() >= deadline:
+            return
+        question = questions[position % len(questions)]
+        position += 1
+        first_token = []
+        start = time.perf_counter()
+
+        def mark_first_token(_):
+            if not first_token:
+                first_token.append(time.perf_counter() - start)
+
+        try:
+            if safety_check.is_safe_input(question):
+                message_handler.respond_to_query(f"load-{session_id}", question, load_chain(), on_token=mark_first_token)
+                status = "ok"
+            else:
+                status = "rejected"
+        except Exception as e:
+            status = type(e).__name__
+        latency = time.perf_counter() - start
+        with lock:
+            results.append({
+                "session": session_id,
+                "status": status,
+                "latency": latency,
+                "first_token": first_token[0] if first_token else latency,
+            })
+
+
+def summarize(results, sessions, seconds):
+    ok = sorted(r["latency"] for r in results if r["status"] == "ok")
+    first_token = sorted(r["first_token"] for r in results if r["status"] == "ok")
+    statuses = Counter(r["status"] for r in results)
+    failed = sum(n for status, n in statuses.items() if status not in ("ok", "rejected"))
+    return {
+        "sessions": sessions,
+        "seconds": seconds,
+        "requests": len(results),
+        "throughput_rps": len(ok) / seconds if seconds else 0.0,
+        "error_rate": failed / len(results) if results else 0.0,
+        "statuses": dict(statuses),
+        **{f"latency_p{round(q * 100)}_ms": percentile(ok, q) * 1000 for q in (0.5, 0.95, 0.99)},
+        **{f"first_token_p{round(q * 100)}_ms": percentile(first_token, q) * 1000 for q in (0.5, 0.95, 0.99)},
+        "stages": tracer.summary(),
+        "response_cache": message_handler.response_cache.stats(),
+        "moderation_cache": safety_check.moderation_cache.stats(),
+        "query_embedding_cache": chain.get_query_embedding_stats(),
+    }
+
+
+def run_level(sessions, load_chain, questions, think_time, args):
+    # Stage percentiles should describe this level only.
+    tracer.reset()
+    reset_caches(not args.no_answer_cache)
+    results, lock = [], threading.Lock()
+    start = time.perf_counter()
+    deadline = start + args.duration
+    threads = [
+        threading.Thread(
+            target=run_session, args=(i, load_chain, questions, think_time, deadline, args, results, lock), daemon=True
+        )
+        for i in range(sessions)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Requests still in flight at the deadline finish before the join returns.
+    return summarize(results, sessions, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", help="Question file (.txt, one per line, or .xlsx with a 'question' column)")
+    parser.add_argument("--sessions", default="1,5,10,25", help="Comma-separated concurrent session counts")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per session count")
+    parser.add_argument("--think-time", default="exp:3", help="fixed:S, uniform:LOW,HIGH or exp:MEAN seconds")
+    parser.add_argument("--llm-latency", type=float, default=1.5)
+    parser.add_argument("--first-token-latency", type=float, default=0.4)
+    parser.add_argument("--embedding-latency", type=float, default=0.1)
+    parser.add_argument("--moderation-latency", type=float, default=0.1)
+    parser.add_argument("--mysql-latency", type=float, default=0.01)
+    parser.add_argument("--chunks", type=int, default=5000, help="Synthetic corpus size")
+    parser.add_argument("--reuse-chain", action="store_true",
+                        help="Load the chain once per process instead of once per request as app.py does")
+    parser.add_argument("--no-answer-cache", action="store_true", help="Disable the response cache")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="load_test.json")
+    args = parser.parse_args()
+
+    questions = load_questions(args.questions)
+    think_time = think_time_sampler(args.think_time)
+    llm = FixedLatencyChatModel(latency=args.llm_latency, first_token_latency=args.first_token_latency)
+    embeddings = HashingEmbeddings(latency=args.embedding_latency)
+    chain.make_embeddings = lambda: embeddings
+    chain.make_llm = lambda: llm
+    fake_moderation = FakeModerationClient(args.moderation_latency)
+    safety_check.get_client = lambda: fake_moderation
+    message_handler.log_to_mysql = fake_mysql_logger(args.mysql_latency)
+
+    work_dir = tempfile.mkdtemp(prefix="packers_load_")
+    db_path = os.path.join(work_dir, "packers_faiss")
+    # get_index_version() reads the index location from the environment on every call
+    os.environ["FAISS_DB_PATH"] = db_path
+    levels = []
+    try:
+        build_index(db_path, args.chunks, HashingEmbeddings(), args.seed)
+        if args.reuse_chain:
+            qa_chain = chain.get_rag_chain(db_path)
+            load_chain = lambda: qa_chain
+        else:
+            # app.py loads the chain on every rerun, so each request pays the index load.
+            load_chain = lambda: chain.get_rag_chain(db_path)
+        print(f"Replaying {len(questions)} questions, think time {args.think_time}, {args.duration:.0f}s per level")
+        print(f"{'sessions':>8} {'req/s':>7} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'ttft p95':>9}")
+        for sessions in [int(v) for v in args.sessions.split(",") if v]:
+            level = run_level(sessions, load_chain, questions, think_time, args)
+            levels.append(level)
+            print(
+                f"{sessions:>8} {level['throughput_rps']:>7.2f} {level['error_rate']:>7.1%} {level['latency_p50_ms']:>8.0f} "
+                f"{level['latency_p95_ms']:>8.0f} {level['latency_p99_ms']:>8.0f} {level['first_token_p95_ms']:>9.0f}"
+            )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {"bot": "packers", "commit": git_commit(), "settings": vars(args), "levels": levels}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
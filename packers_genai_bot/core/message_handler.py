@@ -1,8 +1,62 @@
 
 # ---------------------- Chat Input Processing ----------------------
 
+import time
+from config.env import RESPONSE_CACHE_PATH, RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_MAX_ENTRIES
 from core.safety_check import is_safe_input
 from core.mysql_logger import log_to_mysql
+from core.response_cache import ResponseCache
+from rag.chain import get_index_version, stream_answer, CHAIN_CONFIG
+
+# Exact-match answers shared by every session in this process (or every process, with RESPONSE_CACHE_PATH)
+response_cache = ResponseCache("packers", CHAIN_CONFIG, RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_PATH)
+
+def _remember_answer(query, index_version, answer):
+    # Empty or near-empty answers are not replayed for the whole TTL
+    if answer and len(answer) >= 10:
+        response_cache.set(query, index_version, answer)
+
+def stream_from_rag(query, qa_chain):
+    """Yields the answer as it is generated; cached answers arrive as one piece."""
+    index_version = get_index_version()
+    cached = response_cache.get(query, index_version)
+    if cached is not None:
+        yield cached
+        return
+    start = time.perf_counter()
+    first_token = None
+    parts = []
+    for token in stream_answer(qa_chain, query):
+        if first_token is None:
+            first_token = time.perf_counter() - start
+        parts.append(token)
+        yield token
+    total = time.perf_counter() - start
+    print(f"[message_handler] time to first token {first_token or total:.2f}s, total {total:.2f}s")
+    _remember_answer(query, index_version, "".join(parts).strip())
+
+ESTIMATION_KEYWORDS = ["estimate", "estimation", "calculate", "cost", "price"]
+
+def respond_to_query(name, query, qa_chain, on_token=None):
+    """
+    MySQL logging and estimation/RAG routing for a query that passed moderation, without Streamlit.
+    Returns (bot_msg, wants_estimation); `on_token` receives the answer so far after each streamed token.
+    """
+    log_to_mysql(name, query)
+
+    if any(k in query.lower() for k in ESTIMATION_KEYWORDS):
+        bot_msg = "Sure! Please fill in the details below to get your estimation. 👇"
+        wants_estimation = True
+    else:
+        bot_msg = ""
+        for token in stream_from_rag(query, qa_chain):
+            bot_msg += token
+            if on_token is not None:
+                on_token(bot_msg)
+        wants_estimation = False
+
+    log_to_mysql("bot", bot_msg)
+    return bot_msg, wants_estimation
 
 def process_user_query(query, qa_chain):
     """
@@ -18,15 +72,17 @@ def process_user_query(query, qa_chain):
         st.warning("⚠️ Kindly rephrase your sentence properly to proceed further.")
         return
 
+    # The question is in the transcript before the answer streams, and stays there if streaming fails
     user_msg = f"{st.session_state.name}: {query}"
     st.session_state.chat_history.append(("user", user_msg))
-    log_to_mysql(st.session_state.name, query)
 
-    if any(k in query.lower() for k in ["estimate", "estimation", "calculate", "cost", "price"]):
-        st.session_state.show_estimation_ui = True
-        bot_msg = "Sure! Please fill in the details below to get your estimation. 👇"
-    else:
-        bot_msg = qa_chain.run(query)
+    # Render tokens live; the full answer is shown again by the chat history below
+    placeholder = st.empty()
+    bot_msg, wants_estimation = respond_to_query(
+        st.session_state.name, query, qa_chain, on_token=lambda text: placeholder.markdown(f"i-Assist: {text} ▌")
+    )
+    placeholder.empty()
 
+    if wants_estimation:
+        st.session_state.show_estimation_ui = True
     st.session_state.chat_history.append(("bot", f"i-Assist: {bot_msg}"))
-    log_to_mysql("bot", bot_msg)
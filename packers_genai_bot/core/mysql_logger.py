@@ -2,6 +2,7 @@
 
 import mysql.connector
 import streamlit as st
+from utils.tracing import span
 
 MYSQL_CONFIG = {
     "host": "localhost",
@@ -12,11 +13,12 @@ MYSQL_CONFIG = {
 
 def log_to_mysql(name, message):
     try:
-        conn = mysql.connector.connect(**MYSQL_CONFIG)
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO chat_logs (customer_name, message) VALUES (%s, %s)", (name, message))
-        conn.commit()
-        cursor.close()
-        conn.close()
+        with span("mysql_log"):
+            conn = mysql.connector.connect(**MYSQL_CONFIG)
+            cursor = conn.cursor()
+            cursor.execute("INSERT INTO chat_logs (customer_name, message) VALUES (%s, %s)", (name, message))
+            conn.commit()
+            cursor.close()
+            conn.close()
     except Exception as e:
         st.error(f"MySQL Logging Error: {e}")
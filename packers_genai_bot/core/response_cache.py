@@ -0,0 +1,37 @@
+# ---------------------- Exact-Match Response Cache ----------------------
+
+import hashlib
+import re
+
+from utils.ttl_cache import TTLCache
+
+
+def normalize_query(query):
+    # Case-, whitespace- and punctuation-insensitive form of a question.
+    text = re.sub(r"[^\w\s]", " ", (query or "").lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class ResponseCache:
+    """Exact-match answers keyed by (normalized query, chain config, index version).
+
+    Backed by an in-process LRU, or by a SQLite file shared across Streamlit
+    worker processes when `path` is set. Entries expire after `ttl_seconds`.
+    """
+
+    def __init__(self, bot, chain_config, max_entries=5000, ttl_seconds=3600, path=None):
+        self.chain_config = chain_config
+        self.cache = TTLCache(f"responses:{bot}", max_entries, ttl_seconds, path)
+
+    def _key(self, query, index_version):
+        raw = f"{normalize_query(query)}\x1f{self.chain_config}\x1f{index_version}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, query, index_version):
+        return self.cache.get(self._key(query, index_version))
+
+    def set(self, query, index_version, answer):
+        self.cache.set(self._key(query, index_version), answer)
+
+    def stats(self):
+        return self.cache.stats()
@@ -1,11 +1,40 @@
 # ---------------------- Input Safety Utility ----------------------
 
+import threading
 import openai              # To use OpenAI APIs (e.g., ChatGPT, Moderation, Embeddings)
+from config.env import OPENAI_API_KEY, MODERATION_CACHE_PATH, MODERATION_CACHE_TTL_SECONDS, MODERATION_CACHE_MAX_ENTRIES
+from utils.ttl_cache import TTLCache, normalized_text_key
+from utils.tracing import span
+
+# Moderation verdicts keyed by normalized-text hash, so repeated greetings skip the API call
+moderation_cache = TTLCache("moderation", MODERATION_CACHE_MAX_ENTRIES, MODERATION_CACHE_TTL_SECONDS, MODERATION_CACHE_PATH)
+
+# openai>=1 client, created on first use so importing this module needs no API key
+_client = {"client": None}
+_client_lock = threading.Lock()
+
+def get_client():
+    with _client_lock:
+        if _client["client"] is None:
+            _client["client"] = openai.OpenAI(api_key=OPENAI_API_KEY)
+        return _client["client"]
 
 def is_safe_input(text):
+    key = normalized_text_key(text)
+    cached = moderation_cache.get(key)
+    if cached is not None:
+        return cached
     try:
-        moderation = openai.Moderation.create(input=text)
-        return not moderation['results'][0]['flagged']
-    except Exception:
+        with span("moderation"):
+            result = get_client().moderations.create(input=text)
+        safe = not result.results[0].flagged
+    except Exception as e:
+        # Fail open so an API outage does not block the chat, but never cache the guess
+        print(f"[safety_check] Moderation API error, input allowed unchecked: {e}")
         return True
+    moderation_cache.set(key, safe)
+    return safe
 
+def get_moderation_cache_stats():
+    """Hit/miss counters of the moderation cache."""
+    return moderation_cache.stats()
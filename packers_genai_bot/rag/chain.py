@@ -1,27 +1,89 @@
 # LangChain RetrievalQA setup
 
 import os
+import hashlib
+import time
 from dotenv import load_dotenv
 from langchain_openai import OpenAIEmbeddings, ChatOpenAI
-from langchain_community.vectorstores import FAISS
 from langchain.chains import RetrievalQA
+from langchain_core.prompts import format_document
+from rag.embedding_cache import QueryCachedEmbeddings, QueryEmbeddingLRU
+from rag import vector_store
+from rag.vector_store import configure_search, load_vectorstore
+from rag.vector_retriever import VectorRetriever
+from utils.tracing import span, tracer
+from config.env import FAISS_NPROBE, FAISS_EF_SEARCH, FAISS_RERANK_K_FACTOR, FAISS_MMAP, QUERY_EMBEDDING_CACHE_MAX_ENTRIES
 
 # Load environment variables
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+# Query vectors are shared across reruns and chain reloads in this process
+query_embedding_lru = QueryEmbeddingLRU(QUERY_EMBEDDING_CACHE_MAX_ENTRIES)
+
+LLM_TEMPERATURE = 0.3
+RETRIEVER_K = 3
+# Identifies answer-affecting chain settings for the response cache
+CHAIN_CONFIG = f"default-chat-model|temperature={LLM_TEMPERATURE}|k={RETRIEVER_K}"
+
+def get_index_version(db_path: str = None) -> str:
+    """Short hash of the index files' size and mtime; changes whenever ingest rewrites them."""
+    db_path = db_path or os.getenv("FAISS_DB_PATH", "vectordb/packers_faiss")
+    digest = hashlib.sha256()
+    for name in ("index.faiss", "docstore.sqlite", "index.pkl"):
+        path = os.path.join(db_path, name)
+        if os.path.exists(path):
+            stat = os.stat(path)
+            digest.update(f"{name}|{stat.st_mtime_ns}|{stat.st_size}".encode())
+    return digest.hexdigest()[:16]
+
+# Model factories; the offline benchmarks swap these for fixed-latency fakes
+def make_embeddings():
+    return OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
+
+def make_llm():
+    return ChatOpenAI(temperature=LLM_TEMPERATURE, openai_api_key=OPENAI_API_KEY)
+
 # Set up LLM and embeddings
 def get_rag_chain(db_path: str = None) -> RetrievalQA:
     
     # ✅ Hybrid - Load from env if not provided (Best for both dev and production)
     db_path = db_path or os.getenv("FAISS_DB_PATH", "vectordb/packers_faiss")
 
-    embeddings = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
-    vectorstore = FAISS.load_local(
-        db_path,
-        embeddings,
-        allow_dangerous_deserialization=True
-    )
-    retriever = vectorstore.as_retriever(search_kwargs={"k": 3})
-    llm = ChatOpenAI(temperature=0.3, openai_api_key=OPENAI_API_KEY)
+    embeddings = QueryCachedEmbeddings(make_embeddings(), query_embedding_lru)
+    # ✅ Read-only load; with FAISS_MMAP the vectors are shared with other workers via the page cache
+    vectorstore = load_vectorstore(db_path, embeddings, mmap=FAISS_MMAP)
+    # nprobe / efSearch / re-rank depth for IVF, HNSW and quantized indexes
+    configure_search(vectorstore.index, FAISS_NPROBE, FAISS_EF_SEARCH, FAISS_RERANK_K_FACTOR)
+    retriever = VectorRetriever(vectorstore=vectorstore, k=RETRIEVER_K)
+    llm = make_llm()
     return RetrievalQA.from_chain_type(llm=llm, retriever=retriever, chain_type="stuff")
+
+def get_index_load_stats() -> dict:
+    """Load time, mmap status and process memory of the last index load."""
+    return dict(vector_store.last_load)
+
+def get_query_embedding_stats() -> dict:
+    """Hit/miss and saved-latency counters of the query-embedding cache."""
+    return query_embedding_lru.stats()
+
+# Stream the answer token by token
+def stream_answer(qa_chain: RetrievalQA, query: str):
+    """Yields LLM tokens using the chain's own retriever and "stuff" prompt."""
+    with span("retrieval"):
+        docs = qa_chain.retriever.invoke(query)
+    combine = qa_chain.combine_documents_chain
+    context = combine.document_separator.join(format_document(doc, combine.document_prompt) for doc in docs)
+    prompt = combine.llm_chain.prompt.format_prompt(**{combine.document_variable_name: context, "question": query})
+    start = time.perf_counter()
+    first_token = False
+    try:
+        for chunk in combine.llm_chain.llm.stream(prompt):
+            text = chunk.content if hasattr(chunk, "content") else str(chunk)
+            if text:
+                if not first_token:
+                    first_token = True
+                    tracer.record("llm_first_token", time.perf_counter() - start)
+                yield text
+    finally:
+        tracer.record("llm", time.perf_counter() - start)
@@ -0,0 +1,209 @@
+# ---------------------- Embedding Cache ----------------------
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from langchain_core.embeddings import Embeddings
+
+from utils.tracing import span
+
+_LOOKUP_BATCH = 500
+
+
+def text_key(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """SQLite table of float32 vectors keyed by (model, text hash), evicted LRU."""
+
+    def __init__(self, path, max_entries=200_000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL, PRIMARY KEY (model, text_hash))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+        )
+        self._conn.commit()
+
+    def get_many(self, model, keys):
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), _LOOKUP_BATCH):
+                batch = keys[start:start + _LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings"
+                    f" WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch],
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                    [(now, model, key) for key in found],
+                )
+                self._conn.commit()
+        return found
+
+    def put_many(self, model, items):
+        now = time.time()
+        rows = [(model, key, array("f", vector).tobytes(), now) for key, vector in items]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_used)"
+                " VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN"
+                " (SELECT rowid FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                (overflow,),
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+class CachedEmbeddings(Embeddings):
+    """Wraps an Embeddings model so each distinct chunk text is embedded only once."""
+
+    def __init__(self, underlying, cache_path, max_entries=200_000, pipeline=None):
+        self.underlying = underlying
+        # Optional EmbeddingPipeline for cache misses; its batches are stored as
+        # they finish, so an interrupted build resumes from the cache.
+        self.pipeline = pipeline
+        self.model = getattr(underlying, "model", type(underlying).__name__)
+        self.store = EmbeddingStore(cache_path, max_entries)
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts):
+        keys = [text_key(text) for text in texts]
+        found = self.store.get_many(self.model, keys)
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        if missing and self.pipeline:
+            def checkpoint(batch_texts, batch_vectors):
+                computed = [(text_key(text), vector) for text, vector in zip(batch_texts, batch_vectors)]
+                self.store.put_many(self.model, computed)
+                found.update(computed)
+
+            self.pipeline.embed(list(missing.values()), on_batch=checkpoint)
+        elif missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            computed = list(zip(missing.keys(), vectors))
+            self.store.put_many(self.model, computed)
+            found.update(computed)
+        return [found[key] for key in keys]
+
+    def embed_query(self, text):
+        return self.underlying.embed_query(text)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.store)}
+
+
+class QueryEmbeddingLRU:
+    """Thread-safe LRU of query vectors, bounded by entry count.
+
+    Vectors are kept as float32 arrays. Counts hits and misses and estimates
+    the latency saved as hits times the mean embedding-call latency.
+    """
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.miss_seconds = 0.0
+
+    def get(self, key):
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector.tolist()
+
+    def put(self, key, vector, elapsed):
+        with self._lock:
+            self.misses += 1
+            self.miss_seconds += elapsed
+            self._entries[key] = array("f", vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            mean_miss = self.miss_seconds / self.misses if self.misses else 0.0
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "mean_embed_seconds": mean_miss,
+                "saved_seconds": self.hits * mean_miss,
+            }
+
+
+class QueryCachedEmbeddings(Embeddings):
+    """Serves repeated embed_query calls from a QueryEmbeddingLRU; documents pass through."""
+
+    def __init__(self, underlying, lru):
+        self.underlying = underlying
+        self.model = getattr(underlying, "model", type(underlying).__name__)
+        self.lru = lru
+
+    def embed_documents(self, texts):
+        return self.underlying.embed_documents(texts)
+
+    def embed_query(self, text):
+        key = f"{self.model}:{text_key(text)}"
+        vector = self.lru.get(key)
+        if vector is not None:
+            return vector
+        start = time.perf_counter()
+        with span("query_embedding"):
+            vector = self.underlying.embed_query(text)
+        self.lru.put(key, vector, time.perf_counter() - start)
+        return vector
+
+    def stats(self):
+        return self.lru.stats()
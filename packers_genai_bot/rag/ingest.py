@@ -1,14 +1,25 @@
 # Import standard libraries
 import os  # For interacting with the file system
+import sys  # For making the project root importable when run as a script
 import pandas as pd  # For reading Excel files
 from dotenv import load_dotenv  # For loading environment variables from a .env file
 
 # Import LangChain modules
 from langchain.text_splitter import RecursiveCharacterTextSplitter  # For breaking documents into chunks
 from langchain_openai import OpenAIEmbeddings  # ✅ Modern import for OpenAI embeddings
-from langchain_community.vectorstores import FAISS  # FAISS is used to store and search vector embeddings
 from langchain.docstore.document import Document  # LangChain document wrapper with content and metadata
 
+# ✅ Allow `python rag/ingest.py` as well as `python -m rag.ingest` from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.env import (  # On-disk embedding cache and embedding pipeline settings
+    EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ENTRIES,
+    EMBED_BATCH_SIZE, EMBED_CONCURRENCY, EMBED_REQUESTS_PER_MINUTE, EMBED_MAX_RETRIES,
+    FAISS_INDEX_TYPE, FAISS_RERANK,
+)
+from rag.embedding_cache import CachedEmbeddings  # Skips re-embedding chunks seen in earlier runs
+from rag.embedding_pipeline import EmbeddingPipeline  # Batched, concurrent, rate-limited embedding with retries
+from rag.vector_store import build_vectorstore, save_vectorstore  # Configurable FAISS index, atomic save
+
 # ✅ Load environment variables (like OPENAI_API_KEY) from a `.env` file into environment
 load_dotenv()
 
@@ -37,16 +48,38 @@ splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
 split_docs = splitter.split_documents(documents)
 
 # ✅ Initialize OpenAI Embeddings using your API key from .env or environment variable
-embeddings = OpenAIEmbeddings()
+base_embeddings = OpenAIEmbeddings()
+
+# ✅ Embed cache misses in concurrent, rate-limited batches; finished batches land in the cache,
+#    so a failed run resumes where it stopped
+pipeline = EmbeddingPipeline(
+    OpenAIEmbeddings(max_retries=0),  # The pipeline does its own backoff; client retries would multiply calls
+    batch_size=EMBED_BATCH_SIZE,
+    concurrency=EMBED_CONCURRENCY,
+    requests_per_minute=EMBED_REQUESTS_PER_MINUTE,
+    max_retries=EMBED_MAX_RETRIES,
+)
+
+# ✅ Put the on-disk cache in front so unchanged chunks are never re-embedded
+embeddings = CachedEmbeddings(base_embeddings, EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ENTRIES, pipeline=pipeline)
 
-# ✅ Create a FAISS vector index from the embedded split documents
-faiss_index = FAISS.from_documents(split_docs, embeddings)
+# ✅ Embed the split documents and index them with the configured FAISS index type
+texts = [doc.page_content for doc in split_docs]
+faiss_index = build_vectorstore(
+    list(zip(texts, embeddings.embed_documents(texts))),
+    embeddings,
+    metadatas=[doc.metadata for doc in split_docs],
+    index_type=FAISS_INDEX_TYPE,
+    rerank=FAISS_RERANK,
+)
 
 # ✅ Ensure the output folder exists
 os.makedirs(os.path.dirname(faiss_path), exist_ok=True)
 
-# ✅ Save the FAISS vector store locally at the given path
-faiss_index.save_local(faiss_path)
+# ✅ Save the FAISS vector store locally at the given path (files are swapped in atomically,
+#    so running chatbot workers that memory-mapped the old index keep working until they reload)
+save_vectorstore(faiss_index, faiss_path)
 
 # ✅ Inform the user that vector store creation was successful
 print("✅ Vector store created at:", faiss_path)
+print("✅ Embedding cache:", embeddings.stats())
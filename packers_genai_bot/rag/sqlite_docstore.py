@@ -0,0 +1,141 @@
+# ---------------------- SQLite Docstore ----------------------
+
+"""SQLite docstore for the FAISS index, replacing the pickled index.pkl.
+
+Chunks are read by ID only when a search returns them, so startup cost no
+longer grows with corpus text. Convert an existing index folder with:
+
+    python -m rag.sqlite_docstore vectordb/packers_faiss
+"""
+import argparse
+import json
+import os
+import pickle
+import sqlite3
+import threading
+from collections.abc import Mapping
+
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_core.documents import Document
+
+DOCSTORE_FILE = "docstore.sqlite"
+LEGACY_DOCSTORE_FILE = "index.pkl"
+
+
+def write_docstore(path, docstore, index_to_docstore_id):
+    """Writes every chunk referenced by `index_to_docstore_id` to a new SQLite file at `path`."""
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE docs (id TEXT PRIMARY KEY, page_content TEXT NOT NULL, metadata TEXT NOT NULL)")
+    conn.execute("CREATE TABLE index_map (position INTEGER PRIMARY KEY, doc_id TEXT NOT NULL)")
+    rows = []
+    for doc_id in index_to_docstore_id.values():
+        doc = docstore.search(doc_id)
+        rows.append((doc_id, doc.page_content, json.dumps(doc.metadata, default=str)))
+    conn.executemany("INSERT INTO docs VALUES (?, ?, ?)", rows)
+    conn.executemany("INSERT INTO index_map VALUES (?, ?)", list(index_to_docstore_id.items()))
+    conn.commit()
+    conn.close()
+
+
+class SQLiteDocstore(Docstore, AddableMixin):
+    """Read-mostly docstore over docstore.sqlite; rows are fetched per lookup."""
+
+    def __init__(self, path, read_only=True):
+        self.path = path
+        self._lock = threading.Lock()
+        uri = f"file:{path}?mode=ro" if read_only else f"file:{path}"
+        self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+    def search(self, search):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT page_content, metadata FROM docs WHERE id = ?", (search,)
+            ).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return Document(page_content=row[0], metadata=json.loads(row[1]))
+
+    def add(self, texts):
+        with self._lock:
+            existing = self._conn.execute(
+                f"SELECT id FROM docs WHERE id IN ({','.join('?' * len(texts))})", list(texts)
+            ).fetchall()
+            if existing:
+                raise ValueError(f"Tried to add ids that already exist: {[row[0] for row in existing]}")
+            self._conn.executemany(
+                "INSERT INTO docs VALUES (?, ?, ?)",
+                [(doc_id, doc.page_content, json.dumps(doc.metadata, default=str)) for doc_id, doc in texts.items()],
+            )
+            self._conn.commit()
+
+    def delete(self, ids):
+        with self._lock:
+            self._conn.executemany("DELETE FROM docs WHERE id = ?", [(doc_id,) for doc_id in ids])
+            self._conn.commit()
+
+    def items(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT id, page_content, metadata FROM docs").fetchall()
+        for doc_id, text, metadata in rows:
+            yield doc_id, Document(page_content=text, metadata=json.loads(metadata))
+
+    def index_map(self):
+        return SQLiteIndexMap(self)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+
+class SQLiteIndexMap(Mapping):
+    """Lazy, read-only FAISS position -> docstore id mapping backed by the index_map table."""
+
+    def __init__(self, docstore):
+        self._docstore = docstore
+
+    def _query(self, sql, params=()):
+        with self._docstore._lock:
+            return self._docstore._conn.execute(sql, params).fetchall()
+
+    def __getitem__(self, position):
+        rows = self._query("SELECT doc_id FROM index_map WHERE position = ?", (int(position),))
+        if not rows:
+            raise KeyError(position)
+        return rows[0][0]
+
+    def __iter__(self):
+        return iter([row[0] for row in self._query("SELECT position FROM index_map ORDER BY position")])
+
+    def __len__(self):
+        return self._query("SELECT COUNT(*) FROM index_map")[0][0]
+
+    def values(self):
+        return [row[0] for row in self._query("SELECT doc_id FROM index_map ORDER BY position")]
+
+    def items(self):
+        return self._query("SELECT position, doc_id FROM index_map ORDER BY position")
+
+
+def convert_folder(folder, delete_legacy=False):
+    """Converts `folder`/index.pkl into `folder`/docstore.sqlite."""
+    legacy_path = os.path.join(folder, LEGACY_DOCSTORE_FILE)
+    with open(legacy_path, "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    path = os.path.join(folder, DOCSTORE_FILE)
+    write_docstore(path + ".tmp", docstore, index_to_docstore_id)
+    os.replace(path + ".tmp", path)
+    print(f"Wrote {len(index_to_docstore_id)} chunks to {path}")
+    if delete_legacy:
+        os.remove(legacy_path)
+        print(f"Removed {legacy_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a FAISS index.pkl docstore to docstore.sqlite")
+    parser.add_argument("folders", nargs="+", help="FAISS index folders containing index.pkl")
+    parser.add_argument("--delete-pkl", action="store_true", help="Remove index.pkl after converting")
+    args = parser.parse_args()
+    for folder in args.folders:
+        convert_folder(folder, args.delete_pkl)
@@ -0,0 +1,28 @@
+# ---------------------- Vector Retriever ----------------------
+
+from typing import Any, List
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from utils.tracing import span
+
+
+class VectorRetriever(BaseRetriever):
+    """FAISS top-k retrieval with "vector_search" and "docstore_fetch" spans, like the Medrisk bot's retrievers."""
+
+    vectorstore: Any
+    k: int = 3
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        vector = np.array([self.vectorstore.embeddings.embed_query(query)], dtype="float32")
+        with span("vector_search"):
+            _, positions = self.vectorstore.index.search(vector, self.k)
+        doc_ids = [self.vectorstore.index_to_docstore_id[i] for i in positions[0] if i != -1]
+        with span("docstore_fetch"):
+            docs = [self.vectorstore.docstore.search(doc_id) for doc_id in doc_ids]
+        return [doc for doc in docs if isinstance(doc, Document)]
@@ -0,0 +1,191 @@
+# ---------------------- Vector Store ----------------------
+
+import math
+import os
+import pickle
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+
+from rag.sqlite_docstore import DOCSTORE_FILE, LEGACY_DOCSTORE_FILE, SQLiteDocstore, write_docstore
+
+INDEX_TYPES = ("flat", "ivf", "hnsw", "pq", "sq8")
+# Trained index types need enough vectors for k-means; smaller corpora stay Flat.
+MIN_TRAINING_VECTORS = {"ivf": 1_000, "pq": 10_000}
+HNSW_M = 32
+
+# How the most recent load_vectorstore call went, for sizing workers.
+last_load = {}
+
+
+def _nlist(n_vectors):
+    # ~4*sqrt(n) centroids, capped so each one still gets ~39 training points.
+    return max(1, min(int(4 * math.sqrt(n_vectors)), n_vectors // 39))
+
+
+def _pq_subquantizers(dim):
+    # 8-bit codes over ~16-dim sub-vectors; the count must divide the dimension.
+    m = max(1, dim // 16)
+    while dim % m:
+        m -= 1
+    return m
+
+
+def index_description(index_type, n_vectors, dim, rerank=False):
+    """faiss.index_factory string for `index_type` sized for `n_vectors`."""
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown FAISS index type {index_type!r}; expected one of {INDEX_TYPES}")
+    if n_vectors < MIN_TRAINING_VECTORS.get(index_type, 0):
+        index_type = "flat"
+    if index_type == "flat":
+        return "Flat"
+    if index_type == "ivf":
+        return f"IVF{_nlist(n_vectors)},Flat"
+    if index_type == "hnsw":
+        return f"HNSW{HNSW_M}"
+    codec = f"IVF{_nlist(n_vectors)},PQ{_pq_subquantizers(dim)}" if index_type == "pq" else "SQ8"
+    # RFlat keeps the raw vectors and re-ranks the quantized candidates exactly.
+    return f"{codec},RFlat" if rerank else codec
+
+
+def supports_incremental(index):
+    # LangChain's FAISS.delete renumbers positions after remove_ids, which only holds
+    # for flat-code indexes; IVF never renumbers, and HNSW/RFlat cannot remove at all.
+    return isinstance(faiss.downcast_index(index), (faiss.IndexFlat, faiss.IndexScalarQuantizer))
+
+
+def configure_search(index, nprobe=16, ef_search=64, k_factor=4):
+    """Applies search-time parameters that are not stored in the index file."""
+    params = faiss.ParameterSpace()
+    for name, value in (("nprobe", nprobe), ("efSearch", ef_search), ("k_factor_rf", k_factor)):
+        try:
+            params.set_index_parameter(index, name, value)
+        except RuntimeError:
+            pass  # parameter does not apply to this index type
+    return index
+
+
+def build_vectorstore(text_embeddings, embedding, metadatas=None, ids=None, index_type="flat", rerank=False):
+    """Like FAISS.from_embeddings, but backed by a configurable (possibly trained) index."""
+    vectors = np.asarray([vector for _, vector in text_embeddings], dtype="float32")
+    description = index_description(index_type, len(vectors), vectors.shape[1], rerank)
+    index = faiss.index_factory(vectors.shape[1], description, faiss.METRIC_L2)
+    if not index.is_trained:
+        index.train(vectors)
+    store = FAISS(embedding, index, InMemoryDocstore(), {})
+    store.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+    print(f"[vector_store] Built {description} index over {len(vectors)} vectors")
+    return store
+
+
+def process_memory_mb():
+    """Resident memory of this process; on Linux split into private and file-backed (shareable) pages."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        return {
+            name.lower(): int(fields[key].split()[0]) / 1024
+            for name, key in (("rss", "VmRSS"), ("rss_anon", "RssAnon"), ("rss_file", "RssFile"))
+            if key in fields
+        }
+    except OSError:
+        if resource is None:
+            return {}
+        # Peak rather than current RSS; kilobytes on Linux, bytes on macOS.
+        return {"max_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+
+def _is_mapped(index):
+    # Without IO_FLAG_MMAP_IFC only IVF lists can be mapped; flat codes are read into memory.
+    if hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+        return True
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        return False
+    return isinstance(faiss.downcast_InvertedLists(ivf.invlists), faiss.OnDiskInvertedLists)
+
+
+def _read_index(path, mmap):
+    """Returns (index, mapped); `mapped` is True only if the vectors really are memory-mapped."""
+    if mmap:
+        # IVF lists (IO_FLAG_MMAP) and, on newer FAISS, flat codes (IO_FLAG_MMAP_IFC)
+        # are mapped from the file, so workers share them through the page cache.
+        flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY | getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+        try:
+            index = faiss.read_index(path, flags)
+            return index, _is_mapped(index)
+        except RuntimeError as e:
+            print(f"[vector_store] Memory-mapped load failed ({e}); reading {path} into memory")
+    return faiss.read_index(path), False
+
+
+def docstore_exists(folder):
+    return any(os.path.exists(os.path.join(folder, name)) for name in (DOCSTORE_FILE, LEGACY_DOCSTORE_FILE))
+
+
+def load_vectorstore(folder, embedding, mmap=True, writable=False):
+    """FAISS.load_local equivalent over docstore.sqlite (or a legacy index.pkl).
+
+    By default the store is read-only: index.faiss may be memory-mapped and
+    chunks are read from SQLite by ID as searches return them. Pass
+    `writable=True` to load everything into memory for add/delete.
+    """
+    before = process_memory_mb()
+    start = time.perf_counter()
+    index, mapped = _read_index(os.path.join(folder, "index.faiss"), mmap and not writable)
+    docstore_path = os.path.join(folder, DOCSTORE_FILE)
+    if os.path.exists(docstore_path):
+        docstore = SQLiteDocstore(docstore_path)
+        index_to_docstore_id = docstore.index_map()
+        if writable:
+            index_to_docstore_id = dict(index_to_docstore_id.items())
+            docstore = InMemoryDocstore(dict(docstore.items()))
+    else:
+        # Folder not yet converted: LangChain's pickled (docstore, index_to_docstore_id).
+        with open(os.path.join(folder, LEGACY_DOCSTORE_FILE), "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+    store = FAISS(embedding, index, docstore, index_to_docstore_id)
+    after = {key: round(value, 1) for key, value in process_memory_mb().items()}
+    last_load.clear()
+    last_load.update(
+        folder=folder,
+        mmap=mapped,
+        docstore=type(docstore).__name__,
+        vectors=index.ntotal,
+        seconds=time.perf_counter() - start,
+        memory_mb=after,
+        memory_delta_mb={key: round(after[key] - before.get(key, 0.0), 1) for key in after},
+    )
+    print(
+        f"[vector_store] Loaded {index.ntotal} vectors from {folder} in {last_load['seconds']:.2f}s "
+        f"(mmap={mapped}, memory MB {after})"
+    )
+    return store
+
+
+def save_vectorstore(store, folder):
+    """Writes index.faiss and docstore.sqlite, swapping each file in atomically.
+
+    Writing over index.faiss in place would truncate pages that other
+    processes still have memory-mapped; replacing the file leaves them on the
+    old inode until they reload.
+    """
+    os.makedirs(folder, exist_ok=True)
+    index_path = os.path.join(folder, "index.faiss")
+    docstore_path = os.path.join(folder, DOCSTORE_FILE)
+    faiss.write_index(store.index, index_path + ".tmp")
+    write_docstore(docstore_path + ".tmp", store.docstore, store.index_to_docstore_id)
+    os.replace(index_path + ".tmp", index_path)
+    os.replace(docstore_path + ".tmp", docstore_path)
+    legacy_path = os.path.join(folder, LEGACY_DOCSTORE_FILE)
+    if os.path.exists(legacy_path):
+        os.remove(legacy_path)
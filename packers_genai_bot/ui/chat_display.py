@@ -1,9 +1,30 @@
 # Chat history display block
 
+import math
 import streamlit as st
+from config.env import CHAT_HISTORY_WINDOW, CHAT_HISTORY_PAGE_SIZE
+from utils.tracing import span
 
-def render_chat_history(chat_history):
-    """Render the user-bot chat history in Streamlit UI."""
-    for sender, msg in chat_history:
-        with st.chat_message("🧑" if sender == "user" else "🤖"):
-            st.markdown(msg)
+def render_message(sender, msg):
+    with st.chat_message("🧑" if sender == "user" else "🤖"):
+        st.markdown(msg)
+
+def render_older_messages(chat_history, older, page_size=CHAT_HISTORY_PAGE_SIZE):
+    """Render one page of the messages before the visible window inside an expander."""
+    with st.expander(f"🕘 Older messages ({older})"):
+        pages = math.ceil(older / page_size)
+        page = 1
+        if pages > 1:
+            page = st.number_input("Page (1 = most recent)", min_value=1, max_value=pages, value=1, key="older_messages_page")
+        stop = chat_history.first_position + older - (page - 1) * page_size
+        for sender, msg in chat_history.page(stop - page_size, stop):
+            render_message(sender, msg)
+
+def render_chat_history(chat_history, window=CHAT_HISTORY_WINDOW):
+    """Render the user-bot chat history in Streamlit UI: the newest `window` messages, older ones paged."""
+    with span("render"):
+        older = len(chat_history) - window - chat_history.first_position
+        if older > 0:
+            render_older_messages(chat_history, older)
+        for sender, msg in chat_history.window(window):
+            render_message(sender, msg)
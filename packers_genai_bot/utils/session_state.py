@@ -1,12 +1,13 @@
 # ---------------------- Session State Initialization ----------------------
 
 import streamlit as st
+from config.env import CHAT_TRANSCRIPT_MAX_IN_MEMORY, CHAT_TRANSCRIPT_SPILL_PATH
+from utils.transcript import BoundedTranscript
 
 def init_session_state():
     """Initializes default session state values."""
     defaults = {
         "name": "",
-        "chat_history": [],
         "show_estimation_ui": False,
         "estimation_result": "",
         "estimation_done": False
@@ -14,3 +15,6 @@ def init_session_state():
     for key, value in defaults.items():
         if key not in st.session_state:
             st.session_state[key] = value
+    # Newest turns in memory; older ones are dropped unless CHAT_TRANSCRIPT_SPILL_PATH is set
+    if "chat_history" not in st.session_state:
+        st.session_state.chat_history = BoundedTranscript(CHAT_TRANSCRIPT_MAX_IN_MEMORY, CHAT_TRANSCRIPT_SPILL_PATH)
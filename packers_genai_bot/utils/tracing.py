@@ -0,0 +1,194 @@
+# ---------------------- Tracing ----------------------
+
+import atexit
+import json
+import math
+import os
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+QUANTILES = (0.5, 0.95, 0.99)
+# Spans waiting for the JSONL writer; beyond this they are dropped, never blocking a request.
+JSONL_QUEUE_SIZE = 10000
+
+
+def percentile(sorted_values, q):
+    # Nearest-rank percentile of an already sorted list.
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))]
+
+
+class Tracer:
+    """Per-stage latency spans timed with time.perf_counter().
+
+    Each stage keeps its last `window` durations for p50/p95/p99 plus
+    lifetime count, sum and error totals. Spans can also be appended to a
+    JSONL file, one object per span: request threads only enqueue, and a
+    background thread does the writes through one buffered file handle.
+    """
+
+    def __init__(self, window=2048, jsonl_path=None):
+        self.window = window
+        self.jsonl_path = jsonl_path
+        self.dropped_spans = 0
+        self._stages = {}
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=JSONL_QUEUE_SIZE)
+        self._writer = None
+
+    @contextmanager
+    def span(self, stage, **attrs):
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self.record(stage, time.perf_counter() - start, error=error, **attrs)
+
+    def record(self, stage, seconds, error=None, **attrs):
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = {
+                    "recent": deque(maxlen=self.window), "count": 0, "sum": 0.0, "errors": 0
+                }
+            stats["recent"].append(seconds)
+            stats["count"] += 1
+            stats["sum"] += seconds
+            stats["errors"] += error is not None
+        if self.jsonl_path:
+            self._enqueue({"ts": time.time(), "stage": stage, "seconds": seconds, "error": error, **attrs})
+
+    def _enqueue(self, line):
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_lines, daemon=True)
+                    self._writer.start()
+                    atexit.register(self.flush)
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            self.dropped_spans += 1
+
+    def _write_lines(self):
+        with open(self.jsonl_path, "a", encoding="utf-8") as f:
+            while True:
+                # Drain whatever else is waiting, then flush once per burst.
+                batch = [self._queue.get()]
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                f.write("".join(json.dumps(line, default=str) + "\n" for line in batch))
+                f.flush()
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self):
+        """Blocks until every queued span is written (called at exit)."""
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.join()
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+    def _snapshot(self):
+        with self._lock:
+            return {
+                stage: (sorted(s["recent"]), s["count"], s["sum"], s["errors"])
+                for stage, s in self._stages.items()
+            }
+
+    def summary(self):
+        snapshot = self._snapshot()
+        return {
+            stage: {
+                "count": count,
+                "errors": errors,
+                "mean": total / count if count else 0.0,
+                **{f"p{round(q * 100)}": percentile(recent, q) for q in QUANTILES},
+            }
+            for stage, (recent, count, total, errors) in snapshot.items()
+        }
+
+    def prometheus_text(self, prefix="chatbot"):
+        lines = [
+            f"# HELP {prefix}_stage_seconds Latency of each pipeline stage (quantiles over recent spans).",
+            f"# TYPE {prefix}_stage_seconds summary",
+        ]
+        snapshot = self._snapshot()
+        for stage, (recent, count, total, _) in sorted(snapshot.items()):
+            for q in QUANTILES:
+                lines.append(f'{prefix}_stage_seconds{{stage="{stage}",quantile="{q}"}} {percentile(recent, q):.6f}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {count}')
+        lines.append(f"# TYPE {prefix}_stage_errors_total counter")
+        for stage, (_, _, _, errors) in sorted(snapshot.items()):
+            lines.append(f'{prefix}_stage_errors_total{{stage="{stage}"}} {errors}')
+        return "\n".join(lines) + "\n"
+
+
+tracer = Tracer()
+_server = None
+_server_lock = threading.Lock()
+
+
+def span(stage, **attrs):
+    return tracer.span(stage, **attrs)
+
+
+def start_metrics_server(port, host="127.0.0.1", prefix="chatbot"):
+    """Serves /metrics (Prometheus text) and /metrics.json once per process; safe to call on every rerun."""
+    global _server
+    with _server_lock:
+        if _server is not None or not port:
+            return _server
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/metrics.json"):
+                    body, content_type = json.dumps(tracer.summary()).encode(), "application/json"
+                elif self.path.startswith("/metrics"):
+                    body, content_type = tracer.prometheus_text(prefix).encode(), "text/plain; version=0.0.4"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            _server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            # Another worker on this host already owns the port.
+            print(f"[tracing] Metrics endpoint not started on {host}:{port}: {e}")
+            _server = False
+            return None
+        threading.Thread(target=_server.serve_forever, daemon=True).start()
+        print(f"[tracing] Metrics at http://{host}:{port}/metrics")
+        return _server
+
+
+def configure_tracing(jsonl_path=None, metrics_port=0, prefix="chatbot"):
+    if jsonl_path:
+        folder = os.path.dirname(jsonl_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tracer.jsonl_path = jsonl_path
+    start_metrics_server(metrics_port, prefix=prefix)
@@ -0,0 +1,174 @@
+# ---------------------- TTL Cache ----------------------
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+def normalized_text_key(text):
+    # Case- and whitespace-insensitive hash of a piece of text.
+    normalized = re.sub(r"\s+", " ", (text or "").strip().lower())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class MemoryBackend:
+    """In-process LRU of (expires_at, value) entries."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, now):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires_at):
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """SQLite table shared by every process that opens the same file; values are JSON."""
+
+    def __init__(self, path, namespace, max_entries):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ttl_cache ("
+            " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, last_used REAL NOT NULL, PRIMARY KEY (namespace, key))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ttl_cache_last_used ON ttl_cache (namespace, last_used)"
+        )
+        self._conn.commit()
+
+    def get(self, key, now):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM ttl_cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            if row is None:
+                return _MISSING
+            if row[1] <= now:
+                self._conn.execute(
+                    "DELETE FROM ttl_cache WHERE namespace = ? AND key = ?", (self.namespace, key)
+                )
+                self._conn.commit()
+                return _MISSING
+            self._conn.execute(
+                "UPDATE ttl_cache SET last_used = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key),
+            )
+            self._conn.commit()
+            return json.loads(row[0])
+
+    def set(self, key, value, expires_at):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ttl_cache (namespace, key, value, expires_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, json.dumps(value), expires_at, now),
+            )
+            self._conn.execute(
+                "DELETE FROM ttl_cache WHERE namespace = ? AND expires_at <= ?", (self.namespace, now)
+            )
+            (count,) = self._conn.execute(
+                "SELECT COUNT(*) FROM ttl_cache WHERE namespace = ?", (self.namespace,)
+            ).fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM ttl_cache WHERE rowid IN (SELECT rowid FROM ttl_cache"
+                    " WHERE namespace = ? ORDER BY last_used ASC LIMIT ?)",
+                    (self.namespace, count - self.max_entries),
+                )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM ttl_cache WHERE namespace = ?", (self.namespace,))
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM ttl_cache WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
+
+
+class TTLCache:
+    """Bounded cache with per-entry TTL and hit/miss counters.
+
+    Entries live in an in-process LRU, or in a SQLite file when `path` is given
+    so that several worker processes share them.
+    """
+
+    def __init__(self, name, max_entries=1024, ttl_seconds=3600, path=None):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        if path:
+            self.backend = SQLiteBackend(path, name, max_entries)
+        else:
+            self.backend = MemoryBackend(max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def get(self, key, default=None):
+        value = self.backend.get(key, time.time())
+        with self._stats_lock:
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.backend.set(key, value, time.time() + self.ttl_seconds)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.backend),
+        }